@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2021-2023, Texas Instruments Incorporated. All rights reserved.
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+#
+#
+# Measures the rate at which the edge events of one input are delivered with
+# "async for" over TI.GPIO.aio.edge_events(), against callbacks registered
+# with add_event_detect(). Edges are generated in rounds of a few, waiting for
+# each round to be delivered before starting the next so that no event is
+# dropped.
+#
+# Usage: aio_events.py
+#
+# The edges are driven by the simulated backend, which is always used.
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib", "python")
+)
+
+import TI.GPIO as GPIO
+from TI.GPIO import aio
+from TI.GPIO import gpio
+from TI.GPIO import gpio_sim
+
+rounds = 1000
+edges_per_round = 8
+
+
+def drive(line, level):
+    for _ in range(edges_per_round):
+        level ^= 1
+        gpio_sim.set_input(line[0], line[1], level)
+    return level
+
+
+def threaded(channel, line):
+    delivered = [0]
+    done = threading.Condition()
+
+    def callback(channel):
+        with done:
+            delivered[0] += 1
+            done.notify()
+
+    GPIO.add_event_detect(channel, GPIO.BOTH, callback=callback)
+    level = 0
+    start = time.perf_counter()
+    for i in range(rounds):
+        level = drive(line, level)
+        with done:
+            done.wait_for(lambda: delivered[0] >= (i + 1) * edges_per_round)
+    elapsed = time.perf_counter() - start
+    GPIO.remove_event_detect(channel)
+    return rounds * edges_per_round / elapsed
+
+
+async def asynchronous(channel, line):
+    delivered = 0
+    round_done = asyncio.Event()
+
+    async def consume():
+        nonlocal delivered
+        async for event in aio.edge_events(channel, GPIO.BOTH):
+            delivered += 1
+            if delivered % edges_per_round == 0:
+                round_done.set()
+
+    consumer = asyncio.create_task(consume())
+    await asyncio.sleep(0)
+    level = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        round_done.clear()
+        level = drive(line, level)
+        await round_done.wait()
+    elapsed = time.perf_counter() - start
+    consumer.cancel()
+    try:
+        await consumer
+    except asyncio.CancelledError:
+        pass
+    return rounds * edges_per_round / elapsed
+
+
+def main():
+    GPIO.setbackend("sim")
+    GPIO.setwarnings(False)
+    GPIO.setmode(GPIO.BOARD)
+    channel = sorted(gpio._channel_data)[0]
+    ch_info = gpio._channel_data[channel]
+    line = (ch_info.gpiochip, ch_info.gpio)
+    GPIO.setup(channel, GPIO.IN)
+    print("%s, channel %s" % (GPIO.model, channel))
+
+    print("%-30s %12s" % ("delivery", "events/s"))
+    print("%-30s %12.0f" % ("add_event_detect() callback", threaded(channel, line)))
+    rate = asyncio.run(asynchronous(channel, line))
+    print("%-30s %12.0f" % ("aio.edge_events()", rate))
+
+    GPIO.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2021-2023, Texas Instruments Incorporated. All rights reserved.
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+#
+#
+# Measures the Python time spent per edge event by the event dispatcher when
+# delivering a batch of MAX_EVENTS events to a callback called with the
+# channel, a callback called with an EdgeEvent, a batch callback called once
+# with the list of EdgeEvent, the event recording ring buffer, a
+# GPIO.Counter and a GPIO.PulseCapture, and to a callback behind the software
+# debounce when all the events are bounces, and the highest edge rate each
+# could sustain on one CPU. The batches are passed straight to the dispatch
+# function, so the cost of reading the events from the kernel is not included.
+#
+# Usage: event_cost.py
+#
+# The events are made by the simulated backend, which is always used.
+
+import os
+import sys
+import timeit
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib", "python")
+)
+
+import TI.GPIO as GPIO
+from TI.GPIO import gpio
+from TI.GPIO import gpio_sim
+
+number = 2000
+
+
+def main():
+    GPIO.setbackend("sim")
+    GPIO.setwarnings(False)
+    GPIO.setmode(GPIO.BOARD)
+    channel = sorted(gpio._channel_data)[0]
+    ch_info = gpio._channel_data[channel]
+    GPIO.setup(channel, GPIO.IN)
+    # Have the bouncetime applied by the software debounce
+    gpio_sim.chip(ch_info.gpiochip).debounce_supported = False
+    print("%s, %d events per batch" % (GPIO.model, gpio.MAX_EVENTS))
+
+    rising = gpio_sim.EdgeEvent.Type.RISING_EDGE
+    falling = gpio_sim.EdgeEvent.Type.FALLING_EDGE
+    events = [
+        gpio_sim.EdgeEvent(rising if i % 2 else falling, i * 1000, ch_info.gpio, i, i)
+        for i in range(gpio.MAX_EVENTS)
+    ]
+
+    def callback(arg):
+        pass
+
+    def detect(**kwargs):
+        return lambda: GPIO.add_event_detect(channel, GPIO.BOTH, **kwargs)
+
+    cases = (
+        ("callback(channel)", detect(callback=callback)),
+        ("callback(event)", detect(callback=callback, with_event=True)),
+        ("callback(events), batch", detect(callback=callback, batch=True)),
+        ("record", detect(record=number * len(events))),
+        ("Counter", lambda: GPIO.Counter(channel, GPIO.BOTH)),
+        ("PulseCapture", lambda: GPIO.PulseCapture(channel)),
+        ("bounces, debounced", detect(callback=callback, bouncetime=1)),
+    )
+    print("%-24s %12s %14s" % ("delivery", "ns/event", "max events/s"))
+    for name, start in cases:
+        start()
+        best = min(
+            timeit.repeat(
+                lambda: gpio._dispatch_events(channel, ch_info, events),
+                number=number,
+                repeat=5,
+            )
+        )
+        per_event = best / number / len(events)
+        print("%-24s %12.0f %14.0f" % (name, per_event * 1e9, 1 / per_event))
+        GPIO.remove_event_detect(channel)
+
+    GPIO.cleanup()
+
+
+if __name__ == "__main__":
+    main()
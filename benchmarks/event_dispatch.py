@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2021-2023, Texas Instruments Incorporated. All rights reserved.
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+#
+#
+# Measures the number of threads running and the rate at which edge events are
+# delivered to callbacks with event detection on 1, 8 and 24 inputs. Edges are
+# generated in rounds of a few per input, waiting for each round to be
+# delivered before starting the next so that no event is dropped.
+#
+# Usage: event_dispatch.py
+#
+# The edges are driven by the simulated backend, which is always used.
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib", "python")
+)
+
+import TI.GPIO as GPIO
+from TI.GPIO import gpio
+from TI.GPIO import gpio_sim
+
+rounds = 200
+edges_per_round = 8
+
+
+def os_threads():
+    return len(os.listdir("/proc/self/task"))
+
+
+def run_case(channels):
+    delivered = [0]
+    done = threading.Condition()
+
+    def callback(channel):
+        with done:
+            delivered[0] += 1
+            done.notify()
+
+    lines = [
+        (gpio._channel_data[c].gpiochip, gpio._channel_data[c].gpio) for c in channels
+    ]
+    GPIO.setup(channels, GPIO.IN)
+    for channel in channels:
+        GPIO.add_event_detect(channel, GPIO.BOTH, callback=callback)
+    threads = os_threads()
+
+    level = 0
+    expected = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for _ in range(edges_per_round):
+            level ^= 1
+            for chip, offset in lines:
+                gpio_sim.set_input(chip, offset, level)
+        expected += edges_per_round * len(lines)
+        with done:
+            if not done.wait_for(lambda: delivered[0] >= expected, timeout=5):
+                raise RuntimeError("%d events lost" % (expected - delivered[0]))
+    elapsed = time.perf_counter() - start
+
+    GPIO.cleanup(channels)
+    return threads, expected / elapsed
+
+
+def main():
+    GPIO.setbackend("sim")
+    GPIO.setwarnings(False)
+    GPIO.setmode(GPIO.BOARD)
+    all_channels = sorted(gpio._channel_data)
+    print("%s" % GPIO.model)
+
+    base = os_threads()
+    print("%-10s %14s %14s" % ("inputs", "extra threads", "events/s"))
+    for n in (1, 8, 24):
+        threads, rate = run_case(all_channels[:n])
+        print("%-10d %14d %14.0f" % (n, threads - base, rate))
+
+    GPIO.cleanup()
+
+
+if __name__ == "__main__":
+    main()
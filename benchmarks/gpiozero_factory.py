@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2021-2023, Texas Instruments Incorporated. All rights reserved.
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+#
+#
+# Compares the TI.GPIO gpiozero pin factory with gpiozero's RPiGPIOFactory
+# running on the RPi.GPIO compatibility package of TI.GPIO, as set up by
+# patches/gpiozero.patch: the time taken by LED.toggle(), the latency from an
+# edge to the when_pressed handler of a Button, and the time taken to read the
+# value of an LEDBoard of 8 LEDs, which share a line request as line grouping
+# is enabled.
+#
+# Usage: gpiozero_factory.py
+#
+# Requires gpiozero. The lines are provided by the simulated backend, which
+# is always used.
+
+import os
+import sys
+import threading
+import time
+import timeit
+import warnings
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib", "python")
+)
+
+import TI.GPIO as GPIO
+from TI.GPIO import gpio
+from TI.GPIO import gpio_sim
+
+from gpiozero import Button, LED, LEDBoard
+from gpiozero.pins.rpigpio import RPiGPIOFactory
+from TI.GPIO.pinfactory import TIGPIOFactory
+
+number = 5000
+presses = 200
+led_pin = 17
+button_pin = 27
+board_pins = (5, 6, 13, 19, 26, 16, 20, 21)
+
+
+class PatchedRPiGPIOFactory(RPiGPIOFactory):
+    # The TISKFactory of patches/gpiozero.patch
+    def _get_revision(self):
+        return 0xB03111
+
+
+def press_latency(factory):
+    button = Button(button_pin, pull_up=False, pin_factory=factory)
+    ch_info = gpio._channel_data[button_pin]
+    pressed = threading.Event()
+    released = threading.Event()
+    latencies = []
+    missed = 0
+
+    def when_pressed():
+        latencies.append(time.monotonic_ns() - start_ns)
+        pressed.set()
+
+    button.when_pressed = when_pressed
+    button.when_released = released.set
+    for i in range(presses):
+        pressed.clear()
+        released.clear()
+        start_ns = time.monotonic_ns()
+        gpio_sim.set_input(ch_info.gpiochip, ch_info.gpio, 1)
+        if not pressed.wait(1):
+            missed += 1
+        gpio_sim.set_input(ch_info.gpiochip, ch_info.gpio, 0)
+        released.wait(1)
+    button.close()
+    latencies.sort()
+    return (
+        latencies[len(latencies) // 2],
+        latencies[len(latencies) * 99 // 100],
+        missed,
+    )
+
+
+def run(factory):
+    led = LED(led_pin, pin_factory=factory)
+    toggle = min(timeit.repeat(led.toggle, number=number, repeat=5)) / number
+    led.close()
+
+    median, p99, missed = press_latency(factory)
+
+    board = LEDBoard(*board_pins, pin_factory=factory)
+    read = min(timeit.repeat(lambda: board.value, number=number, repeat=5)) / number
+    batched = None
+    if isinstance(factory, TIGPIOFactory):
+        batched = (
+            min(timeit.repeat(lambda: factory.states(board), number=number, repeat=5))
+            / number
+        )
+    board.close()
+    factory.close()
+    return toggle, median, p99, missed, read, batched
+
+
+def main():
+    GPIO.setbackend("sim")
+    GPIO.setlinegrouping(True)
+    warnings.simplefilter("ignore")
+    print(GPIO.model)
+
+    print(
+        "%-24s %10s %13s %13s %8s %10s"
+        % ("factory", "toggle us", "press p50 us", "press p99 us", "missed", "board us")
+    )
+    for name, factory_class in (
+        ("RPiGPIOFactory, patched", PatchedRPiGPIOFactory),
+        ("TIGPIOFactory", TIGPIOFactory),
+    ):
+        toggle, median, p99, missed, read, batched = run(factory_class())
+        print(
+            "%-24s %10.2f %13.1f %13.1f %8d %10.2f"
+            % (name, toggle * 1e6, median / 1e3, p99 / 1e3, missed, read * 1e6)
+        )
+        if batched is not None:
+            print("%-24s %58.2f" % ("  with states()", batched * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2021-2023, Texas Instruments Incorporated. All rights reserved.
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+#
+# Measures the start-up cost of a process using the library: a bare
+# "import TI.GPIO", and an import followed by setmode(). Each case is timed
+# with the board detected, gpiod imported and the channel tables of all modes
+# built at import time, as "import TI.GPIO" used to do, and lazily, as it does
+# now: board detection and the channel table of the selected mode are built
+# by setmode(). Each case is run in a fresh interpreter so that nothing is
+# shared between runs, with the simulated backend so that it runs anywhere.
+#
+# Usage: import_time.py [REV]
+#
+# If the git revision REV is given, the cases are also run against the library
+# of that revision, e.g. the one before the lazy import, which imports gpiod
+# unconditionally and so only runs on a board.
+
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+runs = 20
+
+top_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+lib_dir = os.path.join(top_dir, "lib", "python")
+
+# What "import TI.GPIO" did before the lazy import
+eager = (
+    "from TI.GPIO import gpio; gpio._load_board_data(); gpio._import_gpiod(); "
+    "import threading; "
+    "[gpio._get_pin_table().index(m) for m in ('BOARD', 'BCM', 'SOC')]"
+)
+
+cases = (
+    ("python (baseline)", "pass", "pass"),
+    ("import TI.GPIO", "import TI.GPIO; " + eager, "import TI.GPIO"),
+    (
+        "import TI.GPIO + setmode(BOARD)",
+        "import TI.GPIO as GPIO; " + eager + "; GPIO.setmode(GPIO.BOARD)",
+        "import TI.GPIO as GPIO; GPIO.setmode(GPIO.BOARD)",
+    ),
+)
+
+timer = "import time; _t = time.perf_counter(); {stmt}; print(time.perf_counter() - _t)"
+
+
+def run_case(stmt, lib_dir, backend="sim"):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = lib_dir + os.pathsep + env.get("PYTHONPATH", "")
+    env["TI_GPIO_BACKEND"] = backend
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", timer.format(stmt=stmt)],
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        if out.returncode != 0:
+            return None, out.stderr.strip().splitlines()[-1]
+        samples.append(float(out.stdout))
+    return samples, None
+
+
+def export_lib(rev, dest):
+    """Extract lib/python of the git revision rev into dest and return its
+    path."""
+    archive = subprocess.run(
+        ["git", "-C", top_dir, "archive", rev, "lib/python"],
+        stdout=subprocess.PIPE,
+        check=True,
+    )
+    subprocess.run(["tar", "-x", "-C", dest], input=archive.stdout, check=True)
+    return os.path.join(dest, "lib", "python")
+
+
+def main():
+    rev = sys.argv[1] if len(sys.argv) > 1 else None
+    print("median ms over %d runs, simulated backend" % runs)
+    print("%-34s %10s %10s" % ("case", "eager", "lazy"))
+    for name, before, after in cases:
+        row = []
+        for stmt in (before, after):
+            samples, error = run_case(stmt, lib_dir)
+            if samples is None:
+                print("%-34s skipped: %s" % (name, error))
+                break
+            row.append(statistics.median(samples) * 1e3)
+        else:
+            print("%-34s %10.2f %10.2f" % (name, row[0], row[1]))
+
+    if rev is None:
+        return
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        rev_lib_dir = export_lib(rev, tmp_dir)
+        print()
+        print("%-34s %10s" % ("case, revision " + rev, "median ms"))
+        for name, _, stmt in cases:
+            # The backend variable is ignored by revisions that predate it
+            samples, error = run_case(stmt, rev_lib_dir, "gpiod")
+            if samples is None:
+                print("%-34s skipped: %s" % (name, error))
+                continue
+            print("%-34s %10.2f" % (name, statistics.median(samples) * 1e3))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
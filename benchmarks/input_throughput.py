@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2021-2023, Texas Instruments Incorporated. All rights reserved.
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+#
+# Measures the rate at which all header channels, set up as inputs, can be
+# scanned: one input() call per channel against a single input_many() call.
+#
+# Usage: input_throughput.py [gpiod|sim]    (defaults to sim)
+#
+# The simulated backend has no system call cost; the number of calls that are
+# an ioctl on the hardware is reported instead.
+
+import os
+import sys
+import timeit
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib", "python")
+)
+
+import TI.GPIO as GPIO
+from TI.GPIO import gpio
+
+number = 2000
+
+
+def count_ioctls(fn):
+    if gpio._backend != "sim":
+        return float("nan")
+    from TI.GPIO import gpio_sim
+
+    before = gpio_sim.stats["ioctls"]
+    fn()
+    return gpio_sim.stats["ioctls"] - before
+
+
+def main():
+    GPIO.setbackend(sys.argv[1] if len(sys.argv) > 1 else "sim")
+    GPIO.setwarnings(False)
+    # The channels of each gpiochip are read and written with one call
+    GPIO.setlinegrouping(True)
+    GPIO.setmode(GPIO.BOARD)
+    channels = sorted(gpio._channel_data)[:20]
+    GPIO.setup(channels, GPIO.IN)
+    print("%s, %d inputs" % (GPIO.model, len(channels)))
+
+    def per_channel():
+        return [GPIO.input(channel) for channel in channels]
+
+    cases = (
+        ("input() per channel", per_channel),
+        ("input_many()", lambda: GPIO.input_many(channels)),
+        ("input_many(as_type=int)", lambda: GPIO.input_many(channels, int)),
+    )
+    print("%-26s %12s %12s %12s" % ("method", "scans/s", "us/scan", "ioctls/scan"))
+    for name, fn in cases:
+        best = min(timeit.repeat(fn, number=number, repeat=5)) / number
+        print(
+            "%-26s %12.0f %12.2f %12.0f"
+            % (name, 1 / best, best * 1e6, count_ioctls(fn))
+        )
+
+    GPIO.cleanup()
+
+
+if __name__ == "__main__":
+    main()
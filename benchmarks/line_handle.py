@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2021-2023, Texas Instruments Incorporated. All rights reserved.
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+#
+#
+# Measures the time per call of the module level output() and input()
+# functions against the methods of a handle returned by GPIO.line(), which
+# validates the channel and looks up its line request once.
+#
+# Usage: line_handle.py [gpiod|sim]    (defaults to sim)
+#
+# With the simulated backend the time is almost entirely the overhead of
+# TI.GPIO itself, as the simulated line request does very little work.
+#
+# WARNING: on hardware this drives a header pin as an output. Disconnect
+# anything attached to the header first.
+
+import os
+import sys
+import timeit
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib", "python")
+)
+
+import TI.GPIO as GPIO
+from TI.GPIO import gpio
+
+number = 20000
+
+
+def main():
+    GPIO.setbackend(sys.argv[1] if len(sys.argv) > 1 else "sim")
+    GPIO.setwarnings(False)
+    GPIO.setmode(GPIO.BOARD)
+    channel = sorted(gpio._channel_data)[0]
+    GPIO.setup(channel, GPIO.OUT)
+    handle = GPIO.line(channel)
+    print("%s, channel %s" % (GPIO.model, channel))
+
+    print("%-32s %12s" % ("call", "ns/call"))
+    for name, fn in (
+        ("GPIO.output(channel, HIGH)", lambda: GPIO.output(channel, GPIO.HIGH)),
+        ("handle.high()", handle.high),
+        ("GPIO.input(channel)", lambda: GPIO.input(channel)),
+        ("handle.value", lambda: handle.value),
+        ("handle.toggle()", handle.toggle),
+    ):
+        best = min(timeit.repeat(fn, number=number, repeat=5))
+        print("%-32s %12.0f" % (name, best / number * 1e9))
+
+    GPIO.cleanup()
+
+
+if __name__ == "__main__":
+    main()
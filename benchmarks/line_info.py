@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2021-2023, Texas Instruments Incorporated. All rights reserved.
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+#
+#
+# Measures setting up every channel of the 40 pin header again with warnings
+# enabled, which queries the line info of each channel already set up, and
+# reports the gpiochips opened and line info queries made for it.
+#
+# Usage: line_info.py [gpiod|sim]    (defaults to sim)
+#
+# Opens and queries are counted by the simulated backend only.
+#
+# WARNING: on hardware this drives every header pin as an output. Disconnect
+# anything attached to the header first.
+
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib", "python")
+)
+
+import TI.GPIO as GPIO
+from TI.GPIO import gpio
+
+runs = 20
+
+
+def sim_stats():
+    if gpio._backend != "sim":
+        return {"ioctls": float("nan"), "opens": float("nan")}
+    from TI.GPIO import gpio_sim
+
+    return dict(gpio_sim.stats)
+
+
+def main():
+    GPIO.setbackend(sys.argv[1] if len(sys.argv) > 1 else "sim")
+    warnings.simplefilter("ignore", RuntimeWarning)
+    GPIO.setmode(GPIO.BOARD)
+    channels = sorted(gpio._channel_data)
+    print("%s, %d channels" % (GPIO.model, len(channels)))
+
+    elapsed = []
+    for _ in range(runs):
+        GPIO.setmode(GPIO.BOARD)
+        GPIO.setup(channels, GPIO.OUT)
+        before = sim_stats()
+        start = time.perf_counter()
+        GPIO.setup(channels, GPIO.IN)
+        elapsed.append(time.perf_counter() - start)
+        after = sim_stats()
+        GPIO.cleanup()
+
+    print("%-12s %14s %14s" % ("ms", "chip opens", "ioctls"))
+    print(
+        "%-12.3f %14.0f %14.0f"
+        % (
+            min(elapsed) * 1000,
+            after["opens"] - before["opens"],
+            after["ioctls"] - before["ioctls"],
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2021-2023, Texas Instruments Incorporated. All rights reserved.
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+#
+# Measures output throughput, in complete words written per second, for 1, 8
+# and 16 channels, writing the channels one output() call at a time, with a
+# single output() call given the list of channels and with a GPIO.Port.
+#
+# Usage: output_throughput.py [gpiod|sim]    (defaults to sim)
+#
+# The simulated backend has no system call cost; the number of calls that are
+# an ioctl on the hardware is reported instead.
+#
+# WARNING: on hardware this drives header pins as outputs. Disconnect anything
+# attached to the header first.
+
+import os
+import sys
+import timeit
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib", "python")
+)
+
+import TI.GPIO as GPIO
+from TI.GPIO import gpio
+
+number = 2000
+
+
+def count_ioctls(fn):
+    if gpio._backend != "sim":
+        return float("nan")
+    from TI.GPIO import gpio_sim
+
+    before = gpio_sim.stats["ioctls"]
+    fn()
+    return gpio_sim.stats["ioctls"] - before
+
+
+def main():
+    GPIO.setbackend(sys.argv[1] if len(sys.argv) > 1 else "sim")
+    GPIO.setwarnings(False)
+    # The channels of each gpiochip are read and written with one call
+    GPIO.setlinegrouping(True)
+    GPIO.setmode(GPIO.BOARD)
+    all_channels = sorted(gpio._channel_data)
+    print("%s" % GPIO.model)
+
+    print(
+        "%-10s %-22s %14s %10s %12s"
+        % ("channels", "method", "words/s", "requests", "ioctls/word")
+    )
+    for n in (1, 8, 16):
+        channels = all_channels[:n]
+        GPIO.setup(channels, GPIO.OUT)
+        requests = len(
+            set(gpio.channelLineRequest[gpio._channel_to_info(c)] for c in channels)
+        )
+        words = [[(i >> bit) & 1 for bit in range(n)] for i in (0x5555, 0xAAAA)]
+
+        def per_channel():
+            for word in words:
+                for channel, value in zip(channels, word):
+                    GPIO.output(channel, value)
+
+        def as_list():
+            for word in words:
+                GPIO.output(channels, word)
+
+        port = GPIO.Port(channels)
+
+        def as_port():
+            port.write(0x5555 & ((1 << n) - 1))
+            port.write(0xAAAA & ((1 << n) - 1))
+
+        for name, fn in (
+            ("output() per channel", per_channel),
+            ("output(list)", as_list),
+            ("Port.write()", as_port),
+        ):
+            best = min(timeit.repeat(fn, number=number, repeat=5))
+            print(
+                "%-10d %-22s %14.0f %10d %12.0f"
+                % (n, name, 2 * number / best, requests, count_ioctls(fn) / 2)
+            )
+        GPIO.cleanup(channels)
+
+    GPIO.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2021-2023, Texas Instruments Incorporated. All rights reserved.
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+#
+# Compares the memory used by, and the channel lookup cost of, the unified
+# PinTable against the previous layout of three per-mode dictionaries of
+# ChannelInfo objects. No hardware is required.
+
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib", "python")
+)
+
+from TI.GPIO import gpio_pin_data as pd
+
+pin_defs = pd.J721E_SK_PIN_DEFS
+pwm_dirs = {
+    "3020000.pwm": "/sys/devices/platform/3020000.pwm/pwm/pwmchip0",
+    "3030000.pwm": "/sys/devices/platform/3030000.pwm/pwm/pwmchip2",
+}
+channels = [x[pd.BOARD_PIN_ENTRY] for x in pin_defs]
+
+
+# Previous layout: one __dict__ based object per pin and per mode
+class LegacyChannelInfo(object):
+    def __init__(self, channel, gpiochip, gpio, pwm_chip_dir, pwm_id):
+        self.channel = channel
+        self.gpiochip = gpiochip
+        self.gpio = gpio
+        self.pwm_chip_dir = pwm_chip_dir
+        self.pwm_id = pwm_id
+
+
+def build_legacy():
+    def model_data(key_col):
+        return {
+            x[key_col]: LegacyChannelInfo(
+                x[key_col],
+                x[pd.GPIO_CHIP_ENTRY],
+                x[pd.OFFSET_ENTRY],
+                pwm_chip_dir=pwm_dirs.get(x[pd.PWM_SYSFS_DIR_ENTRY], None),
+                pwm_id=x[pd.PWM_ID_ENTRY],
+            )
+            for x in pin_defs
+        }
+
+    return {
+        "BOARD": model_data(pd.BOARD_PIN_ENTRY),
+        "BCM": model_data(pd.BCM_PIN_ENTRY),
+        "SOC": model_data(pd.SOC_NAME_ENTRY),
+    }
+
+
+def build_table():
+    table = pd.get_pin_table(pin_defs, pwm_dirs)
+    for mode_name in ("SOC", "BCM", "BOARD"):
+        table.index(mode_name)
+    return table
+
+
+def measure_memory(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    data = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(x.size_diff for x in after.compare_to(before, "filename"))
+    return size, data
+
+
+def legacy_lookup(channel_data, channel, need_pwm=False):
+    if channel not in channel_data:
+        raise ValueError("Channel %s is invalid" % str(channel))
+    ch_info = channel_data[channel]
+    if need_pwm and ch_info.pwm_chip_dir is None:
+        raise ValueError("Channel %s is not a PWM" % str(channel))
+    return ch_info
+
+
+def table_lookup(channel_data, channel, need_pwm=False):
+    try:
+        ch_info = channel_data[channel]
+    except KeyError:
+        raise ValueError("Channel %s is invalid" % str(channel))
+    if need_pwm and ch_info.pwm_chip_dir is None:
+        raise ValueError("Channel %s is not a PWM" % str(channel))
+    return ch_info
+
+
+def measure_lookup(lookup, channel_data, number=20000):
+    def run():
+        for c in channels:
+            lookup(channel_data, c)
+
+    best = min(timeit.repeat(run, number=number, repeat=5))
+    return best / (number * len(channels))
+
+
+def main():
+    legacy_size, legacy = measure_memory(build_legacy)
+    table_size, table = measure_memory(build_table)
+
+    print("%-28s %12s %14s" % ("layout", "bytes", "lookup ns"))
+    print(
+        "%-28s %12d %14.1f"
+        % (
+            "per-mode ChannelInfo dicts",
+            legacy_size,
+            measure_lookup(legacy_lookup, legacy["BOARD"]) * 1e9,
+        )
+    )
+    print(
+        "%-28s %12d %14.1f"
+        % (
+            "PinTable",
+            table_size,
+            measure_lookup(table_lookup, table.index("BOARD")) * 1e9,
+        )
+    )
+    print(
+        "mode switch: %.1f ns"
+        % (min(timeit.repeat(lambda: table.index("BCM"), number=100000)) * 1e4)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2021-2023, Texas Instruments Incorporated. All rights reserved.
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+#
+# Measures the time taken to set up every channel of the 40 pin header as an
+# output, and the number of line requests and file descriptors held
+# afterwards, when channels are set up one at a time and as a single list,
+# with line grouping disabled and enabled.
+#
+# Usage: setup_lines.py [gpiod|sim]    (defaults to sim)
+#
+# The simulated backend uses two file descriptors per line request, the
+# hardware one.
+#
+# WARNING: on hardware this drives every header pin as an output. Disconnect
+# anything attached to the header first.
+
+import os
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib", "python")
+)
+
+import TI.GPIO as GPIO
+from TI.GPIO import gpio
+
+runs = 20
+
+
+def open_fds():
+    return len(os.listdir("/proc/self/fd"))
+
+
+def one_at_a_time(channels):
+    for channel in channels:
+        GPIO.setup(channel, GPIO.OUT)
+
+
+def as_list(channels):
+    GPIO.setup(channels, GPIO.OUT)
+
+
+def run_case(setup_fn, grouping):
+    channels = sorted(gpio._channel_data)
+    GPIO.setlinegrouping(grouping)
+    elapsed = []
+    for _ in range(runs):
+        GPIO.setmode(GPIO.BOARD)
+        fds = open_fds()
+        start = time.perf_counter()
+        setup_fn(channels)
+        elapsed.append(time.perf_counter() - start)
+        requests = len(gpio._request_channels)
+        fds = open_fds() - fds
+        GPIO.cleanup()
+    return min(elapsed), requests, fds
+
+
+def main():
+    GPIO.setbackend(sys.argv[1] if len(sys.argv) > 1 else "sim")
+    GPIO.setwarnings(False)
+    GPIO.setmode(GPIO.BOARD)
+    print("%s, %d channels" % (GPIO.model, len(gpio._channel_data)))
+    GPIO.cleanup()
+
+    print("%-34s %10s %10s %6s" % ("case", "setup ms", "requests", "fds"))
+    for name, setup_fn, grouping in (
+        ("setup() per channel", one_at_a_time, False),
+        ("setup(list)", as_list, False),
+        ("setup() per channel, grouping on", one_at_a_time, True),
+        ("setup(list), grouping on", as_list, True),
+    ):
+        elapsed, requests, fds = run_case(setup_fn, grouping)
+        print("%-34s %10.3f %10d %6d" % (name, elapsed * 1e3, requests, fds))
+
+
+if __name__ == "__main__":
+    main()
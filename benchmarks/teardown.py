@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2021-2023, Texas Instruments Incorporated. All rights reserved.
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+#
+#
+# Measures the time taken by remove_event_detect() and cleanup() to stop the
+# event detection of 1, 8 and 24 inputs with callbacks, and the number of
+# event threads still running when they return. Each case is repeated to
+# show whether threads pile up when channels are configured again and again.
+#
+# Usage: teardown.py
+#
+# The lines are provided by the simulated backend, which is always used.
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib", "python")
+)
+
+import TI.GPIO as GPIO
+from TI.GPIO import gpio
+
+rounds = 50
+
+
+def event_threads():
+    return sum(1 for t in threading.enumerate() if t.name.startswith("TI.GPIO"))
+
+
+def callback(channel):
+    pass
+
+
+def run(channels, teardown):
+    worst = 0.0
+    total = 0.0
+    left = 0
+    for i in range(rounds):
+        GPIO.setmode(GPIO.BOARD)
+        GPIO.setup(channels, GPIO.IN)
+        for channel in channels:
+            GPIO.add_event_detect(channel, GPIO.BOTH, callback=callback)
+        start = time.perf_counter()
+        if teardown == "remove_event_detect":
+            for channel in channels:
+                GPIO.remove_event_detect(channel)
+        else:
+            GPIO.cleanup()
+        elapsed = time.perf_counter() - start
+        left = max(left, event_threads())
+        if teardown == "remove_event_detect":
+            GPIO.cleanup()
+        total += elapsed
+        worst = max(worst, elapsed)
+    return total / rounds, worst, left
+
+
+def main():
+    GPIO.setbackend("sim")
+    GPIO.setwarnings(False)
+    GPIO.setmode(GPIO.BOARD)
+    channels = sorted(gpio._channel_data)
+    print("%s, %d rounds" % (GPIO.model, rounds))
+    GPIO.cleanup()
+
+    print(
+        "%-8s %-20s %10s %10s %14s"
+        % ("inputs", "teardown", "mean ms", "worst ms", "threads left")
+    )
+    for count in (1, 8, 24):
+        for teardown in ("remove_event_detect", "cleanup"):
+            mean, worst, left = run(channels[:count], teardown)
+            print(
+                "%-8d %-20s %10.2f %10.2f %14d"
+                % (count, teardown, mean * 1e3, worst * 1e3, left)
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,11 @@
 from TI.GPIO import *
+import TI.GPIO
 
 VERSION = "2.1.0"
+
+
+def __getattr__(name):
+    # Board information is detected lazily by the TI.GPIO module
+    if name in TI.GPIO.gpio._lazy_attributes:
+        return getattr(TI.GPIO, name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -1,3 +1,10 @@
 from .gpio import *
 
 VERSION = "2.1.0"
+
+
+def __getattr__(name):
+    # Board information is detected lazily by the gpio module
+    if name in gpio._lazy_attributes:
+        return getattr(gpio, name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
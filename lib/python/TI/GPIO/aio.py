@@ -0,0 +1,108 @@
+# Copyright (c) 2021-2023, Texas Instruments Incorporated. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# asyncio interface to edge events. The file descriptor of the line request of
+# the channel is watched by the running event loop with loop.add_reader(), so
+# no thread is involved and the events are read in the thread of the loop.
+# Channels are set up and cleaned up with the functions of TI.GPIO, and must
+# not have event detection enabled with add_event_detect() at the same time.
+#
+#     import TI.GPIO as GPIO
+#     from TI.GPIO import aio
+#
+#     async def main():
+#         GPIO.setmode(GPIO.BOARD)
+#         GPIO.setup(18, GPIO.IN)
+#         await aio.wait_for_edge(18, GPIO.FALLING)
+#         async for event in aio.edge_events(18, GPIO.BOTH):
+#             print(event)
+
+import asyncio
+
+from TI.GPIO import gpio
+
+
+# Coroutine waiting until the specified edge is detected on channel. The
+# parameters are those of GPIO.wait_for_edge(), and so is the result: the
+# number of events read, or 0 once timeout milliseconds have passed without
+# an edge
+async def wait_for_edge(channel, edge, bouncetime=None, timeout=None):
+    ch_info, line_request = gpio._prepare_edge_wait(channel, edge, bouncetime, timeout)
+    loop = asyncio.get_running_loop()
+    readable = asyncio.Event()
+
+    async def wait():
+        while True:
+            await _readable(readable, ch_info)
+            events = []
+            if line_request.wait_edge_events(0):
+                events = line_request.read_edge_events(gpio.MAX_EVENTS)
+            # Bounces removed by the software debounce do not end the wait
+            events = gpio._take_events(ch_info, events)
+            if events:
+                return len(events)
+
+    fd = line_request.fd
+    loop.add_reader(fd, readable.set)
+    try:
+        if timeout is None:
+            return await wait()
+        return await asyncio.wait_for(wait(), timeout / 1000.0)
+    except asyncio.TimeoutError:
+        return 0
+    finally:
+        loop.remove_reader(fd)
+
+
+# Asynchronous iterator over the edge events of channel, e.g.
+# "async for event in edge_events(channel, GPIO.BOTH)". Each item is a
+# GPIO.EdgeEvent. Edge detection is enabled on the channel
+# when iteration starts, and the channel stops being watched when the loop is
+# left or the task is cancelled
+async def edge_events(channel, edge=gpio.BOTH, bouncetime=None):
+    ch_info, line_request = gpio._prepare_edge_wait(channel, edge, bouncetime, None)
+    loop = asyncio.get_running_loop()
+    readable = asyncio.Event()
+
+    fd = line_request.fd
+    loop.add_reader(fd, readable.set)
+    try:
+        while True:
+            await _readable(readable, ch_info)
+            # readable may be set after the events it was set for have been
+            # read, or by the debounce timeout, so check that events are
+            # pending before reading, as reading with none pending blocks
+            events = []
+            if line_request.wait_edge_events(0):
+                events = line_request.read_edge_events(gpio.MAX_EVENTS)
+            for event in gpio._take_events(ch_info, events):
+                yield gpio._edge_event(channel, event)
+    finally:
+        loop.remove_reader(fd)
+
+
+async def _readable(readable, ch_info):
+    # Wait for the reader callback to set readable, or for an edge held by the
+    # software debounce of the channel to settle
+    try:
+        await asyncio.wait_for(readable.wait(), gpio._settle_wait(ch_info))
+    except asyncio.TimeoutError:
+        pass
+    readable.clear()
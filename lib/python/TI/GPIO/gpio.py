@@ -22,22 +22,29 @@
 
 from TI.GPIO import gpio_pin_data
 import TI.GPIO as GPIO
+import functools
 import os
+import select
 import time
 import warnings
-import threading
 
-try:
-    import thread
-except:
-    import _thread as thread
-
-
-from datetime import timedelta
 from collections import defaultdict
 
-import gpiod
-from gpiod.line import Direction, Value, Edge
+# gpiod (and the datetime helpers it needs) are imported by _import_gpiod()
+# once a numbering mode is set, so that importing this module stays cheap.
+# "_gpiod" is bound to the gpio_sim module instead when the simulated backend
+# is selected with setbackend() or the TI_GPIO_BACKEND environment variable.
+# The names are private so that "from TI.GPIO import *" does not export them.
+_backends = ("gpiod", "sim")
+_backend = os.environ.get("TI_GPIO_BACKEND", "gpiod")
+_gpiod = None
+_Direction = None
+_Value = None
+_Edge = None
+_timedelta = None
+_rising_event_type = None
+# The edge event dispatcher (gpio_event.py) is imported by add_event_detect()
+_gpio_event = None
 
 # Pin Numbering Modes
 BOARD = 10
@@ -73,10 +80,22 @@ SPI = 41
 I2C = 42
 HARD_PWM = 43
 
-model, BOARD_INFO, _channel_data_by_mode = gpio_pin_data.get_data()
-RPI_INFO = BOARD_INFO
-
-# Dictionary objects used as lookup tables for pin to linux gpio mapping
+# Policies for a channel whose callbacks fall behind, see setcallbackexecutor()
+# These values (with _POLICY_OFFSET subtracted) must match gpio_event.py
+_POLICY_OFFSET = 50
+BLOCK = 0 + _POLICY_OFFSET
+DROP_OLDEST = 1 + _POLICY_OFFSET
+COALESCE = 2 + _POLICY_OFFSET
+
+# Board detection is deferred until the first setmode() call or the first
+# access to one of these attributes; see __getattr__() below
+_lazy_attributes = ("model", "BOARD_INFO", "RPI_INFO")
+_pin_defs = None
+_pin_table = None
+_board_cache = None
+
+# Lookup index mapping the channels of the selected mode to the pin records of
+# _pin_table
 _channel_data = {}
 
 _sw_pwm_channels = {}
@@ -88,8 +107,134 @@ _channel_configuration = {}
 # GPIOD variables
 MAX_EVENTS = 64
 line_request = None
+# Keyed by the ChannelInfo record of the pin, as line offsets alone are not
+# unique across gpiochips. Several channels of the same gpiochip may share a
+# LineRequest; _request_channels lists the channels of each request and
+# _line_settings holds the gpiod.LineSettings applied to each line.
 channelLineRequest = defaultdict(lambda: None)
+_request_channels = {}
+_line_settings = {}
+# The settings each line was last requested or reconfigured with in the
+# kernel, as returned by _settings_key, to skip reconfiguring unchanged lines
+_applied_settings = {}
+# With line grouping enabled, all lines of a gpiochip are kept in one request
+_line_grouping = False
+_chip_line_requests = {}
+# The (callback, with_event) pairs added for each channel, and the callbacks
+# added with batch=True, called once with all the events read at once
 eventCallbacks = defaultdict(list)
+_batch_callbacks = defaultdict(list)
+# The gpio_event.EventRecorder of each channel recording its events, the
+# gpio_event.EdgeCounter of each channel with a Counter and the
+# gpio_event.PulseRecorder of each channel with a PulseCapture
+_event_recorders = {}
+_event_counters = {}
+_pulse_recorders = {}
+# The gpio_event.Debouncer of each channel whose bouncetime is applied in
+# software, because the kernel does not debounce the line
+_debouncers = {}
+# The gpio_event.EventLatch of each channel with event detection, polled by
+# event_detected()
+_event_latches = {}
+# The gpio_event.EventTally counting the events read and lost for each
+# channel with edge detection, kept as long as the line request of the
+# channel, as the kernel numbers the events per request
+_event_tallies = {}
+# The size of the kernel event buffer of the line requests made with one
+_event_buffer_sizes = {}
+# The (edge, bouncetime, event_buffer_size, line generation) each channel's
+# edge detection was last configured with, so that waiting again for the same
+# edge does not reconfigure the line
+_edge_configs = {}
+# The gpio_event.CallbackExecutor running the callbacks, or None to run them
+# on the thread reading the events
+_callback_executor = None
+# gpiod.Chip objects kept open for line info queries, keyed by gpiochip number.
+# They are closed by cleanup()
+_chips = {}
+# Advanced whenever lines are requested, released, set up or cleaned up, so
+# that objects caching line requests (see Port and Line) look them up again
+_line_generation = 0
+
+
+def _load_board_data():
+    global model, BOARD_INFO, RPI_INFO, _pin_defs, _pin_table, _board_cache
+
+    if _pin_defs is not None:
+        return
+    if _backend == "sim":
+        from TI.GPIO import gpio_sim
+
+        gpio_sim.install()
+    compatible = gpio_pin_data.read_compatible()
+
+    if gpio_pin_data.cache_dir and _backend != "sim":
+        key = gpio_pin_data.cache_key(compatible, GPIO.VERSION)
+        _board_cache = gpio_pin_data.read_cache(key)
+        if (
+            _board_cache is not None
+            and _board_cache.get("model") in gpio_pin_data.board_gpio_data
+            and "pins" in _board_cache
+        ):
+            model = _board_cache["model"]
+            _pin_defs, BOARD_INFO = gpio_pin_data.board_gpio_data[model]
+            RPI_INFO = BOARD_INFO
+            _pin_table = gpio_pin_data.PinTable(_board_cache["pins"])
+            return
+        _board_cache = {"key": key}
+
+    model, BOARD_INFO, _pin_defs = gpio_pin_data.get_model(compatible)
+    RPI_INFO = BOARD_INFO
+
+
+def _get_pin_table():
+    global _pin_table
+
+    _load_board_data()
+    if _pin_table is None:
+        pwm_dirs = gpio_pin_data.get_pwm_dirs(_pin_defs)
+        _pin_table = gpio_pin_data.get_pin_table(_pin_defs, pwm_dirs)
+        if _board_cache is not None:
+            _board_cache["model"] = model
+            _board_cache["pwm_dirs"] = pwm_dirs
+            _board_cache["pins"] = _pin_table.rows()
+            gpio_pin_data.write_cache(_board_cache)
+    return _pin_table
+
+
+def _import_gpiod():
+    global _gpiod, _Direction, _Value, _Edge, _timedelta, _write_sysfs
+    global _rising_event_type
+
+    if _gpiod is not None:
+        return
+    if _backend == "sim":
+        from TI.GPIO import gpio_sim as _gpiod
+        from TI.GPIO.gpio_sim import Direction as _Direction
+        from TI.GPIO.gpio_sim import Edge as _Edge
+        from TI.GPIO.gpio_sim import Value as _Value
+
+        _write_sysfs = _gpiod.write_sysfs
+    else:
+        import gpiod as _gpiod
+        from gpiod.line import Direction as _Direction
+        from gpiod.line import Edge as _Edge
+        from gpiod.line import Value as _Value
+    from datetime import timedelta as _timedelta
+
+    _rising_event_type = _gpiod.EdgeEvent.Type.RISING_EDGE
+
+
+def _write_sysfs(path, value):
+    with open(path, "w") as f:
+        f.write(value)
+
+
+def __getattr__(name):
+    if name in _lazy_attributes:
+        _load_board_data()
+        return globals()[name]
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 
 def _validate_mode_set():
@@ -115,9 +260,10 @@ def _make_iterable(iterable, single_length=None):
 
 
 def _channel_to_info_lookup(channel, need_gpio, need_pwm):
-    if channel not in _channel_data:
+    try:
+        ch_info = _channel_data[channel]
+    except KeyError:
         raise ValueError("Channel %s is invalid" % str(channel))
-    ch_info = _channel_data[channel]
     if need_pwm and ch_info.pwm_chip_dir is None:
         raise ValueError("Channel %s is not a PWM" % str(channel))
     return ch_info
@@ -136,24 +282,54 @@ def _channels_to_infos(channels, need_gpio=False, need_pwm=False):
     ]
 
 
-def channel_configuration(ch_info):
+def _get_chip(gpiochip):
+    try:
+        return _chips[gpiochip]
+    except KeyError:
+        chip = _gpiod.Chip("/dev/gpiochip" + str(gpiochip))
+        _chips[gpiochip] = chip
+        return chip
+
+
+def _close_chips():
+    for chip in _chips.values():
+        chip.close()
+    _chips.clear()
+
+
+def _line_infos(ch_infos):
+    """Return a dict mapping each of ch_infos to the gpiod.LineInfo of its
+    line, fetched in a single pass over each gpiochip."""
+    chip_ch_infos = defaultdict(list)
+    for ch_info in ch_infos:
+        chip_ch_infos[ch_info.gpiochip].append(ch_info)
+
+    line_infos = {}
+    for gpiochip, ch_infos in chip_ch_infos.items():
+        chip = _get_chip(gpiochip)
+        for ch_info in ch_infos:
+            line_infos[ch_info] = chip.get_line_info(ch_info.gpio)
+    return line_infos
+
+
+def channel_configuration(ch_info, line_info=None):
     """Return the current configuration of a channel as reported by sysfs. Any
-    of IN, OUT, PWM, or None may be returned."""
-    channel_direction = Direction.AS_IS
+    of IN, OUT, PWM, or None may be returned. line_info may give the
+    gpiod.LineInfo of the channel if it has already been fetched."""
+    channel_direction = _Direction.AS_IS
 
     if ch_info.pwm_chip_dir is not None:
         pwm_dir = "%s/pwm%i" % (ch_info.pwm_chip_dir, ch_info.pwm_id)
         if os.path.exists(pwm_dir):
             return HARD_PWM
     else:
-        chip_path = "/dev/gpiochip" + str(ch_info.gpiochip)
-        with gpiod.Chip(chip_path) as chip:
-            info = chip.get_line_info(ch_info.gpio)
-            channel_direction = info.direction
+        if line_info is None:
+            line_info = _get_chip(ch_info.gpiochip).get_line_info(ch_info.gpio)
+        channel_direction = line_info.direction
 
-    if channel_direction == Direction.INPUT:
+    if channel_direction == _Direction.INPUT:
         return IN
-    elif channel_direction == Direction.OUTPUT:
+    elif channel_direction == _Direction.OUTPUT:
         return OUT
     else:
         return None
@@ -166,84 +342,458 @@ def _app_channel_configuration(ch_info):
     return _channel_configuration.get(ch_info.channel, None)
 
 
-def _reconfigure_lines(line_request, ch_info, direction, initial):
-    gpiod_direction = Direction.AS_IS
-    gpiod_value = Value.INACTIVE
-
+def _line_settings_for(direction, initial=None):
     if direction == OUT:
-        gpiod_direction = Direction.OUTPUT
+        gpiod_value = _Value.INACTIVE
         if initial == HIGH:
-            gpiod_value = Value.ACTIVE
+            gpiod_value = _Value.ACTIVE
+        return _gpiod.LineSettings(
+            direction=_Direction.OUTPUT, output_value=gpiod_value
+        )
 
-    else:
-        gpiod_direction = Direction.INPUT
+    return _gpiod.LineSettings(direction=_Direction.INPUT)
+
+
+def _sync_output_values(line_request, ch_infos):
+    """Record the levels currently driven on the output lines of ch_infos, so
+    that requesting or reconfiguring their lines again does not change them."""
+    outputs = [
+        ch_info
+        for ch_info in ch_infos
+        if _line_settings[ch_info].direction == _Direction.OUTPUT
+    ]
+    if not outputs:
+        return
+    values = line_request.get_values([ch_info.gpio for ch_info in outputs])
+    for ch_info, value in zip(outputs, values):
+        _line_settings[ch_info].output_value = value
+
+
+def _settings_key(settings):
+    """Return a tuple of the gpiod.LineSettings fields other than the output
+    value, for comparing settings."""
+    return (
+        settings.direction,
+        settings.edge_detection,
+        settings.bias,
+        settings.drive,
+        settings.active_low,
+        settings.debounce_period,
+        settings.event_clock,
+    )
+
+
+def _reconfigure_line_request(line_request, changed):
+    """Apply the settings of the lines in changed. The kernel resets every
+    line of a request that is not given settings, so the current settings of
+    the other lines sharing the request are passed as well. Nothing is done
+    when the lines in changed already have their settings and levels."""
+    ch_infos = _request_channels[line_request]
+    unchanged = [
+        ch_info
+        for ch_info in changed
+        if _applied_settings.get(ch_info) == _settings_key(_line_settings[ch_info])
+    ]
+    if len(unchanged) == len(changed) and all(
+        _line_settings[ch_info].direction != _Direction.OUTPUT for ch_info in unchanged
+    ):
+        return
 
+    # The levels of outputs are read both to keep those of the other lines and
+    # to tell whether a new output value for an unchanged line is to be driven
+    outputs = [
+        ch_info
+        for ch_info in ch_infos
+        if (ch_info not in changed or ch_info in unchanged)
+        and _line_settings[ch_info].direction == _Direction.OUTPUT
+    ]
+    levels = {}
+    if outputs:
+        values = line_request.get_values([ch_info.gpio for ch_info in outputs])
+        levels = dict(zip(outputs, values))
+    if len(unchanged) == len(changed) and all(
+        levels.get(ch_info, _line_settings[ch_info].output_value)
+        == _line_settings[ch_info].output_value
+        for ch_info in unchanged
+    ):
+        return
+
+    for ch_info in outputs:
+        if ch_info not in changed:
+            _line_settings[ch_info].output_value = levels[ch_info]
     line_request.reconfigure_lines(
-        config={
-            ch_info.gpio: gpiod.LineSettings(
-                direction=gpiod_direction, output_value=gpiod_value
-            )
-        }
+        config={ch_info.gpio: _line_settings[ch_info] for ch_info in ch_infos}
     )
-    _channel_configuration[ch_info.channel] = direction
+    for ch_info in ch_infos:
+        _applied_settings[ch_info] = _settings_key(_line_settings[ch_info])
 
 
-def _setup_single_out(ch_info, initial=None):
-    chip_path = "/dev/gpiochip" + str(ch_info.gpiochip)
-    gpiod_val = Value.INACTIVE
+def _advance_line_generation():
+    global _line_generation
+    _line_generation += 1
 
-    if initial == HIGH:
-        gpiod_val = Value.ACTIVE
 
-    line_request = gpiod.request_lines(
-        chip_path,
+def _request_chip_lines(gpiochip, ch_infos, event_buffer_size=None):
+    """Request all lines of ch_infos, which belong to gpiochip, with a single
+    LineRequest using their settings from _line_settings. The kernel sizes
+    the edge event buffer of the request unless event_buffer_size is given."""
+    _advance_line_generation()
+    line_request = _gpiod.request_lines(
+        "/dev/gpiochip" + str(gpiochip),
         consumer=None,
-        config={
-            ch_info.gpio: gpiod.LineSettings(
-                direction=Direction.OUTPUT, output_value=gpiod_val
-            )
-        },
+        config={ch_info.gpio: _line_settings[ch_info] for ch_info in ch_infos},
+        event_buffer_size=event_buffer_size,
     )
+    if event_buffer_size is not None:
+        _event_buffer_sizes[line_request] = event_buffer_size
 
-    channelLineRequest[ch_info.gpio] = line_request
-    _channel_configuration[ch_info.channel] = OUT
+    _request_channels[line_request] = list(ch_infos)
+    for ch_info in ch_infos:
+        channelLineRequest[ch_info] = line_request
+        _applied_settings[ch_info] = _settings_key(_line_settings[ch_info])
+        _event_tallies.pop(ch_info, None)
+    return line_request
 
 
-def _setup_single_in(ch_info):
-    chip_path = "/dev/gpiochip" + str(ch_info.gpiochip)
-    line_request = gpiod.request_lines(
-        chip_path,
-        consumer=None,
-        config={ch_info.gpio: gpiod.LineSettings(direction=Direction.INPUT)},
+def _release_line_request(line_request):
+    _advance_line_generation()
+    ch_infos = _request_channels.pop(line_request)
+    for ch_info in ch_infos:
+        del channelLineRequest[ch_info]
+        del _line_settings[ch_info]
+        del _applied_settings[ch_info]
+        _event_tallies.pop(ch_info, None)
+    if _chip_line_requests.get(ch_infos[0].gpiochip) is line_request:
+        del _chip_line_requests[ch_infos[0].gpiochip]
+    _event_buffer_sizes.pop(line_request, None)
+    line_request.release()
+
+
+def _add_chip_lines(gpiochip, ch_infos):
+    """Request the new lines ch_infos of gpiochip, with one request per line
+    unless line grouping is enabled. They are then requested together and
+    merged into the request already held for the chip; as the kernel cannot
+    add lines to an existing request, that request is released and requested
+    again with the current output levels preserved."""
+    if not _line_grouping:
+        for ch_info in ch_infos:
+            _request_chip_lines(gpiochip, [ch_info])
+        return
+
+    shared = _chip_line_requests.get(gpiochip)
+    # A request read by the event dispatcher has a line with edge detection
+    # and is never merged into
+    if shared is not None and _gpio_event is not None:
+        if _gpio_event.is_registered(shared):
+            del _chip_line_requests[gpiochip]
+            shared = None
+    if shared is not None:
+        old_ch_infos = _request_channels[shared]
+        _sync_output_values(shared, old_ch_infos)
+        del _request_channels[shared]
+        shared.release()
+        ch_infos = old_ch_infos + list(ch_infos)
+
+    _chip_line_requests[gpiochip] = _request_chip_lines(gpiochip, ch_infos)
+
+
+def _split_line(ch_info):
+    """Release the request holding the line of ch_info and request the lines
+    of the other channels of the request again without it, with their output
+    levels preserved. The line of ch_info is left unrequested."""
+    line_request = channelLineRequest[ch_info]
+    ch_infos = _request_channels.pop(line_request)
+    _sync_output_values(line_request, ch_infos)
+    _event_buffer_sizes.pop(line_request, None)
+    line_request.release()
+    others = [x for x in ch_infos if x is not ch_info]
+    if others:
+        shared = _request_chip_lines(ch_info.gpiochip, others)
+        if _chip_line_requests.get(ch_info.gpiochip) is line_request:
+            _chip_line_requests[ch_info.gpiochip] = shared
+    elif _chip_line_requests.get(ch_info.gpiochip) is line_request:
+        del _chip_line_requests[ch_info.gpiochip]
+
+
+def _isolate_line(ch_info, event_buffer_size=None):
+    """Move the line of ch_info to a request of its own, with an edge event
+    buffer of event_buffer_size events. Edge events are read per request, so
+    lines with edge detection are never shared. The buffer size is fixed
+    when the lines are requested, so a line alone in a request with another
+    buffer size is requested again."""
+    line_request = channelLineRequest[ch_info]
+    ch_infos = _request_channels[line_request]
+    if len(ch_infos) == 1:
+        if _event_buffer_sizes.get(line_request) == event_buffer_size:
+            if _chip_line_requests.get(ch_info.gpiochip) is line_request:
+                del _chip_line_requests[ch_info.gpiochip]
+            return
+        _stop_dispatch(ch_info)
+
+    _split_line(ch_info)
+    _request_chip_lines(ch_info.gpiochip, [ch_info], event_buffer_size)
+
+
+def _release_line(ch_info, split=False):
+    """Give up the line of a channel that is being cleaned up. A line that
+    shares its request with channels still in use is returned to input
+    instead, and released together with the rest of the request, unless
+    split is True: the line is then released at once and the other lines
+    of the request are requested again."""
+    line_request = channelLineRequest.get(ch_info)
+    if line_request is None:
+        channelLineRequest.pop(ch_info, None)
+        return
+    ch_infos = _request_channels[line_request]
+    if all(_app_channel_configuration(x) is None for x in ch_infos):
+        _release_line_request(line_request)
+    elif split:
+        _split_line(ch_info)
+        del channelLineRequest[ch_info]
+        del _line_settings[ch_info]
+        del _applied_settings[ch_info]
+        _event_tallies.pop(ch_info, None)
+    else:
+        _line_settings[ch_info] = _line_settings_for(IN)
+        _reconfigure_line_request(line_request, [ch_info])
+
+
+def _configure_edge(ch_info, edge, bouncetime, event_buffer_size=None):
+    config = (edge, bouncetime, event_buffer_size, _line_generation)
+    if _edge_configs.get(ch_info) == config:
+        return
+
+    gpiod_edge = _Edge.NONE
+    if edge == RISING:
+        gpiod_edge = _Edge.RISING
+    elif edge == FALLING:
+        gpiod_edge = _Edge.FALLING
+    else:
+        gpiod_edge = _Edge.BOTH
+
+    debounce_period = _timedelta()
+    if bouncetime is not None:
+        debounce_period = _timedelta(milliseconds=bouncetime)
+
+    _isolate_line(ch_info, event_buffer_size)
+    if ch_info not in _event_tallies:
+        _import_gpio_event()
+        _event_tallies[ch_info] = _gpio_event.EventTally()
+    settings = _gpiod.LineSettings(
+        direction=_Direction.INPUT,
+        edge_detection=gpiod_edge,
+        debounce_period=debounce_period,
+    )
+    _line_settings[ch_info] = settings
+    line_request = channelLineRequest[ch_info]
+    _debouncers.pop(ch_info, None)
+    if not bouncetime:
+        _reconfigure_line_request(line_request, [ch_info])
+        _edge_configs[ch_info] = (edge, bouncetime, event_buffer_size, _line_generation)
+        return
+
+    # Many controllers cannot debounce; the kernel then either rejects the
+    # debounce period or accepts it without applying it, which shows in the
+    # line info. The events are debounced in software instead
+    try:
+        _reconfigure_line_request(line_request, [ch_info])
+        line_info = _get_chip(ch_info.gpiochip).get_line_info(ch_info.gpio)
+        debounced = line_info.debounce_period == debounce_period
+    except OSError:
+        settings.debounce_period = _timedelta()
+        _reconfigure_line_request(line_request, [ch_info])
+        debounced = False
+    if not debounced:
+        _import_gpio_event()
+        # The debounce starts from the current level, so that bounces coming
+        # back to it are not passed on
+        settled_type = _gpiod.EdgeEvent.Type.FALLING_EDGE
+        if line_request.get_value(ch_info.gpio) == _Value.ACTIVE:
+            settled_type = _rising_event_type
+        _debouncers[ch_info] = _gpio_event.Debouncer(bouncetime * 1000000, settled_type)
+    _edge_configs[ch_info] = (edge, bouncetime, event_buffer_size, _line_generation)
+
+
+def _take_events(ch_info, events):
+    """Count the events read from the line of ch_info and return those that
+    are not bounces, for channels debounced in software. Those channels may
+    also return an edge that has settled since events were last read, so
+    this is called with no events once _settle_wait() has passed."""
+    tally = _event_tallies.get(ch_info)
+    if tally is not None:
+        tally.append(events)
+    debouncer = _debouncers.get(ch_info)
+    if debouncer is None:
+        return events
+    return debouncer.filter(events, time.monotonic_ns())
+
+
+def _settle_wait(ch_info, deadline=None):
+    """Return the time in seconds to wait for the edge events of ch_info
+    until the time.monotonic() deadline, shortened to the time at which an
+    edge held by the software debounce of the channel settles; None to wait
+    with no limit."""
+    wait = None
+    if deadline is not None:
+        wait = max(deadline - time.monotonic(), 0)
+    debouncer = _debouncers.get(ch_info)
+    settle_ns = None if debouncer is None else debouncer.deadline()
+    if settle_ns is not None:
+        settle = max(settle_ns - time.monotonic_ns(), 0) / 1e9
+        if wait is None or settle < wait:
+            wait = settle
+    return wait
+
+
+# Class of the edge events passed to the callbacks added with with_event=True
+# and returned by aio.edge_events(). edge is RISING or FALLING, timestamp_ns
+# is the time of the edge as taken by the kernel, and global_seqno and
+# line_seqno number the event among the events of the line request and of
+# the line respectively
+class EdgeEvent(object):
+    __slots__ = ("channel", "edge", "timestamp_ns", "global_seqno", "line_seqno")
+
+    def __init__(self, channel, edge, timestamp_ns, global_seqno, line_seqno):
+        self.channel = channel
+        self.edge = edge
+        self.timestamp_ns = timestamp_ns
+        self.global_seqno = global_seqno
+        self.line_seqno = line_seqno
+
+    def __repr__(self):
+        return "EdgeEvent(channel=%r, edge=%s, timestamp_ns=%d, seqno=%d/%d)" % (
+            self.channel,
+            "RISING" if self.edge == RISING else "FALLING",
+            self.timestamp_ns,
+            self.global_seqno,
+            self.line_seqno,
+        )
+
+
+def _edge_event(channel, event):
+    if event.event_type == _rising_event_type:
+        edge = RISING
+    else:
+        edge = FALLING
+    return EdgeEvent(
+        channel, edge, event.timestamp_ns, event.global_seqno, event.line_seqno
     )
 
-    channelLineRequest[ch_info.gpio] = line_request
-    _channel_configuration[ch_info.channel] = IN
 
+def _dispatch_events(channel, ch_info, events):
+    events = _take_events(ch_info, events)
+    if not events:
+        return
+    latch = _event_latches.get(ch_info)
+    if latch is not None:
+        latch.count += len(events)
+
+    recorder = _event_recorders.get(ch_info)
+    if recorder is not None:
+        recorder.append(events, _rising_event_type)
+    counter = _event_counters.get(ch_info)
+    if counter is not None:
+        counter.append(events)
+    pulses = _pulse_recorders.get(ch_info)
+    if pulses is not None:
+        pulses.append(events, _rising_event_type)
+
+    if eventCallbacks[ch_info]:
+        if _callback_executor is None:
+            for event in events:
+                _run_callbacks(channel, ch_info, event)
+        else:
+            # The callbacks of each event are one job, so that the jobs of a
+            # channel run in order
+            for event in events:
+                _callback_executor.submit(
+                    ch_info, _run_callbacks, channel, ch_info, event
+                )
+
+    if _batch_callbacks[ch_info]:
+        if _callback_executor is None:
+            _run_batch_callbacks(channel, ch_info, events)
+        else:
+            _callback_executor.submit(
+                ch_info, _run_batch_callbacks, channel, ch_info, events
+            )
 
-def callback_handler(channel):
-    ch_info = _channel_to_info(channel, need_gpio=True)
-    while _run_loop:
-        noEvents = channelLineRequest[ch_info.gpio].read_edge_events(MAX_EVENTS)
 
-        for event in noEvents:
-            for callback in eventCallbacks[ch_info.gpio]:
-                callback(channel)
+def _run_batch_callbacks(channel, ch_info, events):
+    rising = _rising_event_type
+    edge_events = [
+        EdgeEvent(
+            channel,
+            RISING if e.event_type == rising else FALLING,
+            e.timestamp_ns,
+            e.global_seqno,
+            e.line_seqno,
+        )
+        for e in events
+    ]
+    for callback in _batch_callbacks[ch_info]:
+        callback(edge_events)
+
+
+def _run_callbacks(channel, ch_info, event):
+    edge_event = None
+    for callback, with_event in eventCallbacks[ch_info]:
+        if not with_event:
+            callback(channel)
+            continue
+        if edge_event is None:
+            edge_event = _edge_event(channel, event)
+        callback(edge_event)
+
+
+def _import_gpio_event():
+    global _gpio_event
+
+    if _gpio_event is None:
+        from TI.GPIO import gpio_event as _gpio_event
+
+
+def _start_dispatch(channel, ch_info, max_events):
+    _import_gpio_event()
+    # The dispatcher is woken up to pass on the edges settling in the software
+    # debounce
+    debouncer = _debouncers.get(ch_info)
+    _gpio_event.add_request(
+        channelLineRequest[ch_info],
+        functools.partial(_dispatch_events, channel, ch_info),
+        max_events,
+        None if debouncer is None else debouncer.deadline,
+    )
 
 
-def start_thread(channel):
-    global _run_loop
-    _run_loop = True
-    thread.start_new_thread(callback_handler, (channel,))
+def _dispatching(ch_info):
+    return _gpio_event is not None and _gpio_event.is_registered(
+        channelLineRequest[ch_info]
+    )
 
 
-def stop_thread():
-    _run_loop = False
+def _stop_dispatch(ch_info):
+    line_request = channelLineRequest[ch_info]
+    if _gpio_event is not None and line_request is not None:
+        _gpio_event.remove_request(line_request)
 
 
 def event_cleanup(ch_info):
-    stop_thread()
-    eventCallbacks[ch_info.gpio].clear()
+    # The dispatcher may be waiting for room for the callbacks of the channel,
+    # which only the callback removing the event detection can make
+    if _callback_executor is not None:
+        _callback_executor.close(ch_info)
+    _stop_dispatch(ch_info)
+    eventCallbacks[ch_info].clear()
+    _batch_callbacks[ch_info].clear()
+    _event_recorders.pop(ch_info, None)
+    _event_counters.pop(ch_info, None)
+    _pulse_recorders.pop(ch_info, None)
+    _debouncers.pop(ch_info, None)
+    _edge_configs.pop(ch_info, None)
+    _event_latches.pop(ch_info, None)
+    if _callback_executor is not None:
+        _callback_executor.forget(ch_info)
 
 
 def _pwm_path(ch_info):
@@ -272,8 +822,7 @@ def _pwm_enable_path(ch_info):
 
 def _export_pwm(ch_info):
     if not os.path.exists(_pwm_path(ch_info)):
-        with open(_pwm_export_path(ch_info), "w") as f:
-            f.write(str(ch_info.pwm_id))
+        _write_sysfs(_pwm_export_path(ch_info), str(ch_info.pwm_id))
 
     enable_path = _pwm_enable_path(ch_info)
     while not os.access(enable_path, os.R_OK | os.W_OK):
@@ -285,13 +834,11 @@ def _export_pwm(ch_info):
 def _unexport_pwm(ch_info):
     ch_info.f_duty_cycle.close()
 
-    with open(_pwm_unexport_path(ch_info), "w") as f:
-        f.write(str(ch_info.pwm_id))
+    _write_sysfs(_pwm_unexport_path(ch_info), str(ch_info.pwm_id))
 
 
 def _set_pwm_period(ch_info, period_ns):
-    with open(_pwm_period_path(ch_info), "w") as f:
-        f.write(str(period_ns))
+    _write_sysfs(_pwm_period_path(ch_info), str(period_ns))
 
 
 def _set_pwm_duty_cycle(ch_info, duty_cycle_ns):
@@ -315,16 +862,14 @@ def _set_pwm_duty_cycle(ch_info, duty_cycle_ns):
 
 
 def _enable_pwm(ch_info):
-    with open(_pwm_enable_path(ch_info), "w") as f:
-        f.write("1")
+    _write_sysfs(_pwm_enable_path(ch_info), "1")
 
 
 def _disable_pwm(ch_info):
-    with open(_pwm_enable_path(ch_info), "w") as f:
-        f.write("0")
+    _write_sysfs(_pwm_enable_path(ch_info), "0")
 
 
-def _cleanup_one(ch_info):
+def _cleanup_one(ch_info, split=False):
     app_cfg = _channel_configuration[ch_info.channel]
     if app_cfg == HARD_PWM:
         _disable_pwm(ch_info)
@@ -333,6 +878,9 @@ def _cleanup_one(ch_info):
         event_cleanup(ch_info)
 
     del _channel_configuration[ch_info.channel]
+    _advance_line_generation()
+    # A channel used for hardware PWM holds no line, but drops its entry
+    _release_line(ch_info, split)
 
 
 def _cleanup_all():
@@ -343,6 +891,7 @@ def _cleanup_all():
         ch_info = _channel_to_info(channel)
         _cleanup_one(ch_info)
 
+    _close_chips()
     _gpio_mode = None
 
 
@@ -353,6 +902,58 @@ def setwarnings(state):
     _gpio_warnings = bool(state)
 
 
+# Function used to enable/disable line grouping. When enabled, all channels of
+# a gpiochip are held in a single line request, to which channels set up later
+# are added; otherwise each channel has a line request of its own. Param ->
+# state is a bool
+def setlinegrouping(state):
+    global _line_grouping
+    _line_grouping = bool(state)
+
+
+# Function used to run event callbacks on a pool of worker threads instead of
+# the thread reading the events, so that slow callbacks do not cause events to
+# be lost. Param workers is the number of threads, 0 to run the callbacks on
+# the reading thread again. Each channel has a queue of up to queue_size
+# events whose callbacks have not run yet, and the callbacks of a channel run
+# in order. policy selects what happens to a new event when the queue is full:
+# BLOCK waits for room, which stops reading events meanwhile, DROP_OLDEST
+# discards the oldest event queued and COALESCE replaces the newest event
+# queued with the new one
+def setcallbackexecutor(workers, queue_size=MAX_EVENTS, policy=BLOCK):
+    global _callback_executor
+
+    if type(workers) != int or workers < 0:
+        raise ValueError("workers must be an integer greater than or equal to 0")
+    if type(queue_size) != int or queue_size <= 0:
+        raise ValueError("queue_size must be an integer greater than 0")
+    if policy not in (BLOCK, DROP_OLDEST, COALESCE):
+        raise ValueError("The policy must be BLOCK, DROP_OLDEST or COALESCE")
+
+    if _callback_executor is not None:
+        _callback_executor.shutdown()
+        _callback_executor = None
+    if workers:
+        _import_gpio_event()
+        _callback_executor = _gpio_event.CallbackExecutor(
+            workers, queue_size, policy - _POLICY_OFFSET
+        )
+
+
+# Function used to select the implementation used to access the GPIO lines.
+# Param name is "gpiod" (the default) for the hardware, or "sim" for an
+# in-process simulation that needs no hardware. The backend must be selected
+# before the first call to setmode() or access to the board information.
+def setbackend(name):
+    global _backend
+
+    if name not in _backends:
+        raise ValueError("An invalid backend was passed to setbackend()!")
+    if name != _backend and (_gpiod is not None or _pin_defs is not None):
+        raise RuntimeError("The backend must be selected before setmode()")
+    _backend = name
+
+
 # Function used to set the pin mumbering mode. Possible mode values are BOARD,
 # BCM, and SOC
 def setmode(mode):
@@ -372,7 +973,8 @@ def setmode(mode):
     if mode not in mode_map:
         raise ValueError("An invalid mode was passed to setmode()!")
 
-    _channel_data = _channel_data_by_mode[mode_map[mode]]
+    _channel_data = _get_pin_table().index(mode_map[mode])
+    _import_gpiod()
     _gpio_mode = mode
 
 
@@ -425,30 +1027,44 @@ def setup(channels, direction, pull_up_down=_Default(PUD_OFF), initial=None):
         )
 
     if _gpio_warnings:
-        for ch_info in ch_infos:
-            gpiod_cfg = channel_configuration(ch_info)
-            app_cfg = _app_channel_configuration(ch_info)
+        # Only channels already set up by this program can warn, so only their
+        # lines are queried
+        in_use = [x for x in ch_infos if _app_channel_configuration(x) is not None]
+        line_infos = _line_infos([x for x in in_use if x.pwm_chip_dir is None])
+        for ch_info in in_use:
+            gpiod_cfg = channel_configuration(ch_info, line_infos.get(ch_info))
             # warn if channel has been setup external to current program
-            if app_cfg is not None and gpiod_cfg is not None:
+            if gpiod_cfg is not None:
                 warnings.warn(
                     "This channel is already in use, continuing anyway. "
                     "Use GPIO.setwarnings(False) to disable warnings",
                     RuntimeWarning,
                 )
 
-    for ch_info in ch_infos:
-        if channelLineRequest[ch_info.gpio] is not None:
-            _reconfigure_lines(
-                channelLineRequest[ch_info.gpio], ch_info, direction, initial
-            )
+    if direction == IN and initial is not None:
+        raise ValueError("initial parameter is not valid for inputs")
 
-        elif direction == OUT:
-            _setup_single_out(ch_info, initial)
+    # Lines that are already requested are reconfigured with one call per
+    # request, and new lines are requested with one call per gpiochip when
+    # line grouping is enabled
+    reconfigure = defaultdict(list)
+    new_lines = defaultdict(list)
+    for ch_info in ch_infos:
+        line_request = channelLineRequest[ch_info]
+        if line_request is not None:
+            reconfigure[line_request].append(ch_info)
+        elif ch_info not in new_lines[ch_info.gpiochip]:
+            new_lines[ch_info.gpiochip].append(ch_info)
+        _line_settings[ch_info] = _line_settings_for(direction, initial)
+
+    for line_request, changed in reconfigure.items():
+        _reconfigure_line_request(line_request, changed)
+    for gpiochip, chip_ch_infos in new_lines.items():
+        _add_chip_lines(gpiochip, chip_ch_infos)
 
-        else:
-            if initial is not None:
-                raise ValueError("initial parameter is not valid for inputs")
-            _setup_single_in(ch_info)
+    for ch_info in ch_infos:
+        _channel_configuration[ch_info.channel] = direction
+    _advance_line_generation()
 
 
 # Function used to cleanup channels at the end of the program.
@@ -479,21 +1095,66 @@ def cleanup(channel=None):
 
 
 # Function used to return the current value of the specified channel.
-# Function returns either HIGH or LOW
+# Function returns either HIGH or LOW. If a list/tuple of channels is given, a
+# list of values is returned as by input_many()
 def input(channel):
+    if isinstance(channel, (list, tuple)):
+        return input_many(channel)
+
     ch_info = _channel_to_info(channel, need_gpio=True)
 
     app_cfg = _app_channel_configuration(ch_info)
     if app_cfg not in [IN, OUT]:
         raise RuntimeError("You must setup() the GPIO channel first")
 
-    value_read = channelLineRequest[ch_info.gpio].get_value(ch_info.gpio)
-    if value_read == Value.ACTIVE:
+    value_read = channelLineRequest[ch_info].get_value(ch_info.gpio)
+    if value_read == _Value.ACTIVE:
         return HIGH
     else:
         return LOW
 
 
+# Function used to read the values of several channels at once. Param channels
+# must be a list/tuple of channels. Channels on the same gpiochip are read with
+# one call. as_type selects the result: list (the default) returns a list of
+# HIGH/LOW in the order of channels, dict maps each channel to its value and int
+# returns a bitmask in which bit n is the value of channels[n]
+def input_many(channels, as_type=list):
+    if as_type not in (list, dict, int):
+        raise ValueError("as_type must be list, dict or int")
+
+    channels = _make_iterable(channels)
+    ch_infos = _channels_to_infos(channels, need_gpio=True)
+    if any(
+        _app_channel_configuration(ch_info) not in [IN, OUT] for ch_info in ch_infos
+    ):
+        raise RuntimeError("You must setup() the GPIO channel first")
+
+    request_lines = {}
+    for i, ch_info in enumerate(ch_infos):
+        line_request = channelLineRequest[ch_info]
+        lines = request_lines.get(line_request)
+        if lines is None:
+            lines = request_lines[line_request] = ([], [])
+        lines[0].append(ch_info.gpio)
+        lines[1].append(i)
+
+    values = [LOW] * len(ch_infos)
+    for line_request, (offsets, indexes) in request_lines.items():
+        for i, value in zip(indexes, line_request.get_values(offsets)):
+            if value == _Value.ACTIVE:
+                values[i] = HIGH
+
+    if as_type is dict:
+        return dict(zip(channels, values))
+    if as_type is int:
+        bitmask = 0
+        for bit, value in enumerate(values):
+            bitmask |= value << bit
+        return bitmask
+    return values
+
+
 # Function used to set a value to a channel or list/tuple of channels.
 # Parameter channels must be an integer or list/tuple of integers.
 # Values must be either HIGH or LOW or list/tuple
@@ -508,14 +1169,42 @@ def output(channels, values):
     if any(_app_channel_configuration(ch_info) != OUT for ch_info in ch_infos):
         raise RuntimeError("The GPIO channel has not been set up as an " "OUTPUT")
 
+    if len(ch_infos) == 1:
+        ch_info = ch_infos[0]
+        if values[0] == HIGH:
+            channelLineRequest[ch_info].set_value(ch_info.gpio, _Value.ACTIVE)
+        else:
+            channelLineRequest[ch_info].set_value(ch_info.gpio, _Value.INACTIVE)
+        return
+
+    # Lines sharing a line request (i.e. on the same gpiochip, see setup())
+    # are written with a single call, so that they change together
+    request_values = {}
     for ch_info, value in zip(ch_infos, values):
+        line_request = channelLineRequest[ch_info]
+        line_values = request_values.get(line_request)
+        if line_values is None:
+            line_values = request_values[line_request] = {}
         if value == HIGH:
-            channelLineRequest[ch_info.gpio].set_value(ch_info.gpio, Value.ACTIVE)
+            line_values[ch_info.gpio] = _Value.ACTIVE
         else:
-            channelLineRequest[ch_info.gpio].set_value(ch_info.gpio, Value.INACTIVE)
+            line_values[ch_info.gpio] = _Value.INACTIVE
+
+    for line_request, line_values in request_values.items():
+        line_request.set_values(line_values)
 
 
-# Function used to check if an event occurred on the specified channel.
+# Function used to set the values of several channels at once. Param values
+# must be a dictionary mapping each channel to HIGH or LOW. Channels on the
+# same gpiochip are written with one call, as with output() given a list.
+def output_many(values):
+    output(list(values.keys()), list(values.values()))
+
+
+# Function used to check if an event occurred on the specified channel since
+# the last call, after add_event_detect() was called for it. The events are
+# latched by the thread reading them, so the check reads no events itself and
+# does not take them from the callbacks of the channel.
 # Param channel must be an integer.
 # This function return True or False
 def event_detected(channel):
@@ -524,14 +1213,17 @@ def event_detected(channel):
     if _app_channel_configuration(ch_info) != IN:
         raise RuntimeError("You must setup() the GPIO channel as an " "input first")
 
-    noEvents = 0
-    noEvents = len(channelLineRequest[ch_info.gpio].read_edge_events(MAX_EVENTS))
-    return noEvents
+    latch = _event_latches.get(ch_info)
+    if latch is None:
+        return False
+    return latch.take() > 0
 
 
 # Function used to add a callback function to channel, after it has been
-# registered for events using add_event_detect()
-def add_event_callback(channel, callback):
+# registered for events using add_event_detect(). The callback is called with
+# the channel, or with an EdgeEvent if with_event is True. If batch is True,
+# the callback is instead called once with the list of EdgeEvent read at once
+def add_event_callback(channel, callback, with_event=False, batch=False):
     ch_info = _channel_to_info(channel, need_gpio=True)
     if not callable(callback):
         raise TypeError("Parameter must be callable")
@@ -539,22 +1231,50 @@ def add_event_callback(channel, callback):
     if _app_channel_configuration(ch_info) != IN:
         raise RuntimeError("You must setup() the GPIO channel as an " "input first")
 
-    with gpiod.Chip("/dev/gpiochip" + str(ch_info.gpiochip)) as chip:
-        info = chip.get_line_info(ch_info.gpio)
-        if info.edge_detection == Edge.NONE:
-            raise RuntimeError(
-                "Add event detection using add_event_detect first "
-                "before adding a callback"
-            )
+    # The kernel keeps edge detection enabled on a line after its event
+    # detection is removed or wait_for_edge() returns, so look at the requests
+    # the dispatcher reads instead
+    if not _dispatching(ch_info):
+        raise RuntimeError(
+            "Add event detection using add_event_detect first "
+            "before adding a callback"
+        )
 
-    eventCallbacks[ch_info.gpio].append(callback)
+    _add_callback(ch_info, callback, with_event, batch)
+
+
+def _add_callback(ch_info, callback, with_event, batch):
+    if batch:
+        _batch_callbacks[ch_info].append(callback)
+    else:
+        eventCallbacks[ch_info].append((callback, bool(with_event)))
 
 
 # Function used to add threaded event detection for a specified gpio channel.
 # Param gpio must be an integer specifying the channel, edge must be RISING,
 # FALLING or BOTH. A callback function to be called when the event is detected
-# and an integer bounctime in milliseconds can be optionally provided
-def add_event_detect(channel, edge, callback=None, bouncetime=None):
+# and an integer bounctime in milliseconds can be optionally provided. The
+# callback is called with the channel, or with an EdgeEvent if with_event is
+# True, or once with the list of EdgeEvent read at once if batch is True.
+# max_events is the largest number of events read at once, MAX_EVENTS by
+# default. If record is given, the events are also recorded in a buffer of
+# that many events, to be read with drain(); once it is full, new events
+# replace the oldest if overwrite is True, and are dropped otherwise.
+# event_buffer_size sets the number of events the kernel buffers for the
+# channel until they are read, which it chooses by default; events are lost
+# when the buffer overflows, see event_stats()
+def add_event_detect(
+    channel,
+    edge,
+    callback=None,
+    bouncetime=None,
+    with_event=False,
+    record=None,
+    overwrite=True,
+    batch=False,
+    max_events=MAX_EVENTS,
+    event_buffer_size=None,
+):
     ch_info = _channel_to_info(channel, need_gpio=True)
     if (not callable(callback)) and callback is not None:
         raise TypeError("Callback Parameter must be callable")
@@ -567,6 +1287,10 @@ def add_event_detect(channel, edge, callback=None, bouncetime=None):
     if edge != RISING and edge != FALLING and edge != BOTH:
         raise ValueError("The edge must be set to RISING, FALLING, or BOTH")
 
+    # -666 is RPi.GPIO's value for no bouncetime, passed by gpiozero
+    if bouncetime == -666:
+        bouncetime = None
+
     # if bouncetime is provided, it must be int and greater than 0
     if bouncetime is not None:
         if type(bouncetime) != int:
@@ -575,51 +1299,232 @@ def add_event_detect(channel, edge, callback=None, bouncetime=None):
         elif bouncetime < 0:
             raise ValueError("bouncetime must be an integer greater than 0")
 
-    gpiod_edge = Edge.NONE
-    if edge == RISING:
-        gpiod_edge = Edge.RISING
-    elif edge == FALLING:
-        gpiod_edge = Edge.FALLING
-    else:
-        gpiod_edge = Edge.BOTH
-
-    if bouncetime != None:
-        channelLineRequest[ch_info.gpio].reconfigure_lines(
-            config={
-                ch_info.gpio: gpiod.LineSettings(
-                    edge_detection=gpiod_edge,
-                    debounce_period=timedelta(milliseconds=bouncetime),
-                )
-            }
-        )
-    else:
-        channelLineRequest[ch_info.gpio].reconfigure_lines(
-            config={
-                ch_info.gpio: gpiod.LineSettings(
-                    edge_detection=gpiod_edge,
-                    debounce_period=timedelta(),
-                )
-            }
-        )
+    # if record is provided, it must be int and greater than 0
+    if record is not None:
+        if type(record) != int:
+            raise TypeError("record must be an integer")
+
+        elif record <= 0:
+            raise ValueError("record must be an integer greater than 0")
+
+    if type(max_events) != int:
+        raise TypeError("max_events must be an integer")
+    elif max_events <= 0:
+        raise ValueError("max_events must be an integer greater than 0")
+
+    # if event_buffer_size is provided, it must be int and greater than 0
+    if event_buffer_size is not None:
+        if type(event_buffer_size) != int:
+            raise TypeError("event_buffer_size must be an integer")
 
+        elif event_buffer_size <= 0:
+            raise ValueError("event_buffer_size must be an integer greater than 0")
+
+    _configure_edge(ch_info, edge, bouncetime, event_buffer_size)
+
+    # The callback is added before the events are dispatched, so that it sees
+    # the first of them
     if callback is not None:
-        add_event_callback(channel, callback)
+        _add_callback(ch_info, callback, with_event, batch)
+
+    if record is not None:
+        _import_gpio_event()
+        _event_recorders[ch_info] = _gpio_event.EventRecorder(record, overwrite)
+
+    if ch_info not in _event_latches:
+        _import_gpio_event()
+        _event_latches[ch_info] = _gpio_event.EventLatch()
+
+    _start_dispatch(channel, ch_info, max_events)
+
+
+# Function used to read the events recorded for channel since the last call,
+# after add_event_detect() was given the record parameter. The events are
+# returned oldest first as a tuple of three array.array: the timestamps in
+# nanoseconds, the edges (1 for rising and 2 for falling, i.e. RISING and
+# FALLING less _EDGE_OFFSET) and the sequence numbers of the events of the
+# line. If numpy is True, a NumPy structured array with the fields
+# timestamp_ns, edge and seqno is returned instead
+def drain(channel, numpy=False):
+    ch_info = _channel_to_info(channel, need_gpio=True)
+    recorder = _event_recorders.get(ch_info)
+    if recorder is None:
+        raise RuntimeError(
+            "Enable recording using add_event_detect(..., record=...) first"
+        )
+
+    records = recorder.drain()
+    if not numpy:
+        return records
+    return _structured_array(
+        (("timestamp_ns", "u8"), ("edge", "u1"), ("seqno", "u8")), records
+    )
 
-    start_thread(channel)
+
+def _structured_array(fields, columns):
+    """Return a NumPy structured array with the (name, dtype) fields, filled
+    from the array.array columns."""
+    import numpy as np
+
+    records = np.empty(len(columns[0]), dtype=list(fields))
+    for (name, dtype), column in zip(fields, columns):
+        records[name] = np.frombuffer(column, dtype=dtype)
+    return records
+
+
+# Function used to get the event statistics of channel. Returns a dictionary
+# with the number of events whose callbacks are queued (queue_depth) and the
+# events dropped (queue_dropped) or coalesced (queue_coalesced) because the
+# queue was full, see setcallbackexecutor(), and the events dropped because
+# the recording buffer was full (record_dropped) or as bounces by the software
+# debounce (debounce_dropped). The events read from the kernel are counted in
+# delivered, and those the kernel dropped because its event buffer for the
+# channel overflowed in kernel_dropped
+def event_stats(channel):
+    ch_info = _channel_to_info(channel, need_gpio=True)
+    stats = {
+        "queue_depth": 0,
+        "queue_dropped": 0,
+        "queue_coalesced": 0,
+        "record_dropped": 0,
+        "debounce_dropped": 0,
+        "delivered": 0,
+        "kernel_dropped": 0,
+    }
+    if _callback_executor is not None:
+        depth, dropped, coalesced = _callback_executor.stats(ch_info)
+        stats["queue_depth"] = depth
+        stats["queue_dropped"] = dropped
+        stats["queue_coalesced"] = coalesced
+    recorder = _event_recorders.get(ch_info)
+    if recorder is not None:
+        stats["record_dropped"] = recorder.dropped
+    debouncer = _debouncers.get(ch_info)
+    if debouncer is not None:
+        stats["debounce_dropped"] = debouncer.dropped
+    tally = _event_tallies.get(ch_info)
+    if tally is not None:
+        stats["delivered"] = tally.delivered
+        stats["kernel_dropped"] = tally.lost
+    return stats
 
 
 # Function used to remove event detection for channel
 def remove_event_detect(channel):
     ch_info = _channel_to_info(channel, need_gpio=True)
-    eventCallbacks[ch_info.gpio].clear()
+    event_cleanup(ch_info)
 
 
 # Function used to perform a blocking wait until the specified edge
 # is detected for the param channel. Channel must be an integer and edge must
 # be either RISING, FALLING or BOTH.
 # bouncetime in milliseconds and timeout in millseconds can optionally be
-# provided
+# provided. Channel may also be a list or tuple of channels, in which case
+# the result is that of wait_for_any()
 def wait_for_edge(channel, edge, bouncetime=None, timeout=None):
+    if isinstance(channel, (list, tuple)):
+        return wait_for_any(channel, edge, bouncetime, timeout)
+
+    ch_info, line_request = _prepare_edge_wait(channel, edge, bouncetime, timeout)
+
+    deadline = None
+    if timeout is not None:
+        deadline = time.monotonic() + timeout / 1000.0
+    while True:
+        wait = _settle_wait(ch_info, deadline)
+        if wait is not None:
+            wait = _timedelta(seconds=wait)
+        events = []
+        if line_request.wait_edge_events(wait):
+            events = line_request.read_edge_events(MAX_EVENTS)
+
+        # Bounces removed by the software debounce do not end the wait
+        noEvents = _take_events(ch_info, events)
+        if noEvents:
+            print("Number of Events Pending ", len(noEvents))
+            return len(noEvents)
+        if deadline is not None and time.monotonic() >= deadline:
+            return 0
+
+
+# Function used to wait until the specified edge is detected on any of
+# channels, with a single poll of their line requests. The parameters are
+# those of wait_for_edge(). Returns a dictionary mapping each channel that
+# fired to the list of its GPIO.EdgeEvent, which is empty once timeout
+# milliseconds have passed without an edge
+def wait_for_any(channels, edge, bouncetime=None, timeout=None):
+    waits = {}
+    poller = select.poll()
+    for channel in _make_iterable(channels):
+        ch_info, line_request = _prepare_edge_wait(channel, edge, bouncetime, timeout)
+        fd = line_request.fd
+        if fd not in waits:
+            waits[fd] = (channel, ch_info, line_request)
+            poller.register(fd, select.POLLIN)
+
+    deadline = None
+    if timeout is not None:
+        deadline = time.monotonic() + timeout / 1000.0
+    while True:
+        wait = None
+        for _, ch_info, _ in waits.values():
+            ch_wait = _settle_wait(ch_info, deadline)
+            if ch_wait is not None and (wait is None or ch_wait < wait):
+                wait = ch_wait
+        ready = set(fd for fd, _ in poller.poll(None if wait is None else wait * 1e3))
+
+        fired = {}
+        for fd, (channel, ch_info, line_request) in waits.items():
+            events = []
+            if fd in ready and line_request.wait_edge_events(0):
+                events = line_request.read_edge_events(MAX_EVENTS)
+            # Bounces removed by the software debounce do not end the wait
+            events = _take_events(ch_info, events)
+            if events:
+                fired[channel] = [_edge_event(channel, e) for e in events]
+        if fired:
+            return fired
+        if deadline is not None and time.monotonic() >= deadline:
+            return {}
+
+
+# Function used to measure the width of the next pulse of channel at level,
+# HIGH or LOW, from the kernel timestamps of its edges. Edge detection on both
+# edges is enabled on the channel, which must be an input without event
+# detection, and edges seen before the call are ignored. Returns the width in
+# nanoseconds, or None once timeout milliseconds have passed without a whole
+# pulse
+def measure_pulse(channel, level=HIGH, timeout=None):
+    if level != HIGH and level != LOW:
+        raise ValueError("The level must be set to HIGH or LOW")
+
+    ch_info, line_request = _prepare_edge_wait(channel, BOTH, None, timeout)
+    while line_request.wait_edge_events(0):
+        _take_events(ch_info, line_request.read_edge_events(MAX_EVENTS))
+
+    if timeout is not None:
+        deadline = time.monotonic() + timeout / 1000.0
+    start_rising = level == HIGH
+    start_ns = None
+    while True:
+        wait = None
+        if timeout is not None:
+            wait = _timedelta(seconds=max(deadline - time.monotonic(), 0))
+        if not line_request.wait_edge_events(wait):
+            return None
+
+        events = _take_events(ch_info, line_request.read_edge_events(MAX_EVENTS))
+        for event in events:
+            if (event.event_type == _rising_event_type) == start_rising:
+                start_ns = event.timestamp_ns
+            elif start_ns is not None:
+                return event.timestamp_ns - start_ns
+
+
+def _prepare_edge_wait(channel, edge, bouncetime, timeout):
+    """Check the arguments of wait_for_edge() and its asyncio counterpart in
+    aio.py, enable edge detection on the channel and return its ch_info and
+    line request."""
     ch_info = _channel_to_info(channel, need_gpio=True)
 
     # channel must be setup as input
@@ -646,46 +1551,14 @@ def wait_for_edge(channel, edge, bouncetime=None, timeout=None):
         elif timeout < 0:
             raise ValueError("Timeout must greater than 0")
 
-    gpiod_edge = Edge.NONE
-    if edge == RISING:
-        gpiod_edge = Edge.RISING
-    elif edge == FALLING:
-        gpiod_edge = Edge.FALLING
-    else:
-        gpiod_edge = Edge.BOTH
-
-    if bouncetime != None:
-        channelLineRequest[ch_info.gpio].reconfigure_lines(
-            config={
-                ch_info.gpio: gpiod.LineSettings(
-                    edge_detection=gpiod_edge,
-                    debounce_period=timedelta(milliseconds=bouncetime),
-                )
-            }
-        )
-    else:
-        channelLineRequest[ch_info.gpio].reconfigure_lines(
-            config={
-                ch_info.gpio: gpiod.LineSettings(
-                    edge_detection=gpiod_edge,
-                    debounce_period=timedelta(),
-                )
-            }
-        )
-
-    if timeout != None:
-        status = channelLineRequest[ch_info.gpio].wait_edge_events(
-            timedelta(milliseconds=timeout)
+    # the events of a channel with event detection are read by the dispatcher
+    if _dispatching(ch_info):
+        raise RuntimeError(
+            "Conflicting edge detection already enabled for this GPIO channel"
         )
-    else:
-        status = channelLineRequest[ch_info.gpio].wait_edge_events(None)
-
-    if status == True:
-        noEvents = channelLineRequest[ch_info.gpio].read_edge_events(MAX_EVENTS)
-        print("Number of Events Pending ", len(noEvents))
-        return len(noEvents)
 
-    return 0
+    _configure_edge(ch_info, edge, bouncetime)
+    return ch_info, channelLineRequest[ch_info]
 
 
 # Function used to check the currently set function of the channel specified.
@@ -693,12 +1566,317 @@ def wait_for_edge(channel, edge, bouncetime=None, timeout=None):
 # or UNKNOWN
 def gpio_function(channel):
     ch_info = _channel_to_info(channel)
-    func = _channel_configuration(ch_info)
+    func = _channel_configuration.get(ch_info.channel)
     if func is None:
         func = UNKNOWN
     return func
 
 
+def _port_byte_tables(lines):
+    """Return the (shift, values, offsets) tables of the lines of a Port held
+    in one request, for each byte of the word holding one of their bits.
+    values[b] maps the offsets of those lines to their Value when the byte is
+    b, and offsets[m] lists the offsets selected when the byte of the mask is
+    m."""
+    tables = []
+    for shift in sorted(set((mask.bit_length() - 1) & ~7 for _, mask in lines)):
+        byte_lines = [(o, m >> shift) for o, m in lines if (m >> shift) & 0xFF]
+        values = tuple(
+            {o: _Value.ACTIVE if b & m else _Value.INACTIVE for o, m in byte_lines}
+            for b in range(256)
+        )
+        offsets = tuple(tuple(o for o, m in byte_lines if b & m) for b in range(256))
+        tables.append((shift, values, offsets))
+    return tables
+
+
+# Class used to read and write a set of channels as the bits of an integer
+# word, e.g. the data bus of a parallel LCD or the inputs of a DAC ladder.
+# Param channels is the list/tuple of channels, channels[n] being bit n, and
+# direction must be IN or OUT, or None to use channels that have already been
+# set up as they are. Param initial optionally gives the word written to an
+# output port once it has been set up. Channels on the same gpiochip are read
+# and written with a single call.
+class Port(object):
+    def __init__(self, channels, direction=OUT, initial=None):
+        if direction == IN and initial is not None:
+            raise ValueError("initial parameter is not valid for inputs")
+        self.channels = tuple(_make_iterable(channels))
+        if len(set(_channels_to_infos(self.channels))) != len(self.channels):
+            raise ValueError("A channel can be used only once in a Port")
+        self.width = len(self.channels)
+
+        if direction is not None:
+            setup(self.channels, direction)
+        self._bind()
+        if initial is not None:
+            self.write(initial)
+
+    def _bind(self):
+        # Resolve the channels to the line requests holding them, and build
+        # the tables converting words to line values for each request
+        ch_infos = _channels_to_infos(self.channels, need_gpio=True)
+        configurations = set(_app_channel_configuration(x) for x in ch_infos)
+        if not configurations <= set([IN, OUT]):
+            raise RuntimeError("The GPIO channels of the Port have been cleaned up")
+        self._output = configurations == set([OUT])
+
+        request_lines = {}
+        for bit, ch_info in enumerate(ch_infos):
+            lines = request_lines.setdefault(channelLineRequest[ch_info], [])
+            lines.append((ch_info.gpio, 1 << bit))
+        self._groups = [
+            (
+                line_request,
+                [o for o, _ in lines],
+                [m for _, m in lines],
+                _port_byte_tables(lines),
+            )
+            for line_request, lines in request_lines.items()
+        ]
+        self._generation = _line_generation
+
+    # Set the channels to the bits of value. If mask is given, only the
+    # channels of the bits set in mask are written
+    def write(self, value, mask=None):
+        if self._generation != _line_generation:
+            self._bind()
+        if not self._output:
+            raise RuntimeError(
+                "The GPIO channels of the Port have not been set up as an OUTPUT"
+            )
+        if value >> self.width:
+            raise ValueError("Value %r does not fit the Port" % (value,))
+
+        for line_request, _, _, tables in self._groups:
+            if mask is None and len(tables) == 1:
+                shift, values, _ = tables[0]
+                line_request.set_values(values[(value >> shift) & 0xFF])
+                continue
+            line_values = {}
+            for shift, values, offsets in tables:
+                byte_values = values[(value >> shift) & 0xFF]
+                if mask is None:
+                    line_values.update(byte_values)
+                else:
+                    for offset in offsets[(mask >> shift) & 0xFF]:
+                        line_values[offset] = byte_values[offset]
+            if line_values:
+                line_request.set_values(line_values)
+
+    # Return the values of the channels as the bits of an integer
+    def read(self):
+        if self._generation != _line_generation:
+            self._bind()
+
+        active = _Value.ACTIVE
+        value = 0
+        for line_request, offsets, masks, _ in self._groups:
+            for mask, line_value in zip(masks, line_request.get_values(offsets)):
+                if line_value == active:
+                    value |= mask
+        return value
+
+    def cleanup(self):
+        cleanup(self.channels)
+
+
+# Class used to count the edges of an input channel without running Python
+# code per edge. Param channel must have been set up as an input, edge must be
+# RISING, FALLING or BOTH and bouncetime is as for add_event_detect(), which is
+# used to enable edge detection. frequency gives the rate of the edges over the
+# last window seconds, computed from the kernel timestamps of the edges
+class Counter(object):
+    def __init__(self, channel, edge=RISING, window=1.0, bouncetime=None):
+        if window <= 0:
+            raise ValueError("window must be greater than 0")
+        self.channel = channel
+        add_event_detect(channel, edge, bouncetime=bouncetime)
+        self._ch_info = _channel_to_info(channel, need_gpio=True)
+        self._counter = _gpio_event.EdgeCounter(int(window * 1e9))
+        _event_counters[self._ch_info] = self._counter
+
+    def _check(self):
+        if _event_counters.get(self._ch_info) is not self._counter:
+            raise RuntimeError("The Counter has been closed")
+
+    # Number of edges counted since the Counter was created or reset
+    @property
+    def count(self):
+        self._check()
+        return self._counter.count
+
+    # Rate of the edges in Hz
+    @property
+    def frequency(self):
+        self._check()
+        return self._counter.frequency(time.monotonic_ns())
+
+    def reset(self):
+        self._check()
+        self._counter.reset()
+
+    # Stop counting, and the event detection of the channel
+    def close(self):
+        if _event_counters.get(self._ch_info) is self._counter:
+            remove_event_detect(self.channel)
+
+
+# Class used to capture the pulses of an input channel, e.g. the signal of an
+# RC receiver. Param channel must have been set up as an input, and
+# bouncetime is as for add_event_detect(), which is used to enable edge
+# detection on both edges. The width of every pulse is computed from the
+# kernel timestamps of its edges and kept in a buffer of size pulses, read
+# with read(). high_ns, low_ns, period_ns and duty_cycle give the latest
+# measurements, and are 0 until the pulses they need have been seen
+class PulseCapture(object):
+    def __init__(self, channel, size=1024, bouncetime=None, overwrite=True):
+        if type(size) != int:
+            raise TypeError("size must be an integer")
+        elif size <= 0:
+            raise ValueError("size must be an integer greater than 0")
+        self.channel = channel
+        add_event_detect(channel, BOTH, bouncetime=bouncetime)
+        self._ch_info = _channel_to_info(channel, need_gpio=True)
+        self._pulses = _gpio_event.PulseRecorder(size, overwrite)
+        _pulse_recorders[self._ch_info] = self._pulses
+
+    def _check(self):
+        if _pulse_recorders.get(self._ch_info) is not self._pulses:
+            raise RuntimeError("The PulseCapture has been closed")
+
+    # Width in nanoseconds of the latest high pulse
+    @property
+    def high_ns(self):
+        self._check()
+        return self._pulses.high_ns
+
+    # Width in nanoseconds of the latest low pulse
+    @property
+    def low_ns(self):
+        self._check()
+        return self._pulses.low_ns
+
+    # Sum of the latest high and low widths
+    @property
+    def period_ns(self):
+        self._check()
+        return self._pulses.period_ns
+
+    # Share of the period spent high, in percent
+    @property
+    def duty_cycle(self):
+        self._check()
+        return self._pulses.duty_cycle
+
+    # Number of pulses lost because the buffer was full
+    @property
+    def dropped(self):
+        self._check()
+        return self._pulses.dropped
+
+    # Remove the pulses captured since the last call from the buffer and
+    # return them oldest first as a tuple of three array.array: the
+    # timestamps of the starts of the pulses and their widths in nanoseconds,
+    # and their levels (HIGH or LOW). If numpy is True, a NumPy structured
+    # array with the fields start_ns, width_ns and level is returned instead
+    def read(self, numpy=False):
+        self._check()
+        records = self._pulses.drain()
+        if not numpy:
+            return records
+        return _structured_array(
+            (("start_ns", "u8"), ("width_ns", "u8"), ("level", "u1")), records
+        )
+
+    # Stop capturing, and the event detection of the channel
+    def close(self):
+        if _pulse_recorders.get(self._ch_info) is self._pulses:
+            remove_event_detect(self.channel)
+
+
+# Class of the handles returned by line(). The channel is validated and its
+# line request looked up once, so that the methods call straight into the
+# LineRequest. The handle is bound again when the line request of the channel
+# changes, and raises RuntimeError once the channel has been cleaned up.
+class Line(object):
+    __slots__ = (
+        "channel",
+        "_ch_info",
+        "_offset",
+        "_generation",
+        "_get_value",
+        "_set_value",
+        "_active",
+        "_inactive",
+    )
+
+    def __init__(self, channel):
+        self.channel = channel
+        self._ch_info = _channel_to_info(channel, need_gpio=True)
+        self._offset = self._ch_info.gpio
+        self._active = _Value.ACTIVE
+        self._inactive = _Value.INACTIVE
+        self._bind()
+
+    def _bind(self):
+        app_cfg = _app_channel_configuration(self._ch_info)
+        if app_cfg not in [IN, OUT]:
+            raise RuntimeError("You must setup() the GPIO channel first")
+        line_request = channelLineRequest[self._ch_info]
+        self._get_value = line_request.get_value
+        if app_cfg == OUT:
+            self._set_value = line_request.set_value
+        else:
+            self._set_value = self._not_output
+        self._generation = _line_generation
+
+    def _not_output(self, offset, value):
+        raise RuntimeError("The GPIO channel has not been set up as an " "OUTPUT")
+
+    def high(self):
+        if self._generation != _line_generation:
+            self._bind()
+        self._set_value(self._offset, self._active)
+
+    def low(self):
+        if self._generation != _line_generation:
+            self._bind()
+        self._set_value(self._offset, self._inactive)
+
+    def toggle(self):
+        if self._generation != _line_generation:
+            self._bind()
+        if self._get_value(self._offset) == self._active:
+            self._set_value(self._offset, self._inactive)
+        else:
+            self._set_value(self._offset, self._active)
+
+    @property
+    def value(self):
+        if self._generation != _line_generation:
+            self._bind()
+        if self._get_value(self._offset) == self._active:
+            return HIGH
+        return LOW
+
+    @value.setter
+    def value(self, value):
+        if self._generation != _line_generation:
+            self._bind()
+        if value == HIGH:
+            self._set_value(self._offset, self._active)
+        else:
+            self._set_value(self._offset, self._inactive)
+
+
+# Function used to get a handle to a channel that has been set up, for fast
+# repeated access. The handle has methods high(), low() and toggle(), and its
+# value attribute reads or sets the channel as HIGH or LOW
+def line(channel):
+    return Line(channel)
+
+
 class HW_PWM(object):
     def __init__(self, channel, frequency_hz):
         self._ch_info = _channel_to_info(channel, need_pwm=True)
@@ -708,9 +1886,10 @@ class HW_PWM(object):
             raise ValueError("Can't create duplicate PWM objects")
         # Apps typically set up channels as GPIO before making them be PWM,
         # because RPi.GPIO does soft-PWM. We must undo the GPIO export to
-        # allow HW PWM to run on the pin.
+        # allow HW PWM to run on the pin. Its line is taken out of a request
+        # shared with other channels, which would otherwise keep it.
         if app_cfg in [IN, OUT]:
-            cleanup(channel)
+            _cleanup_one(self._ch_info, split=True)
 
         if _gpio_warnings:
             sysfs_cfg = channel_configuration(self._ch_info)
@@ -843,6 +2022,8 @@ class SW_PWM(object):
             raise ValueError("Invalid duty cycle")
 
         if not self._started:
+            import threading
+
             # Create a new object. There is no restart support i.e. if you
             # stop a thread then it cannot be started again.
             self.thread = threading.Thread(target=self._pwm_device, args=())
@@ -0,0 +1,698 @@
+# Copyright (c) 2021-2023, Texas Instruments Incorporated. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Edge event dispatcher used by gpio.py. The file descriptors of all line
+# requests with edge detection are registered with a single epoll object, and
+# one thread waits on it, reads the pending events of each ready request in a
+# batch and passes them to the handler registered for the request. The thread
+# is started when the first request is added, and requests may be added and
+# removed at any time. A pipe registered with the epoll object next to the
+# requests wakes the thread up when it must stop, so that it can be joined
+# without waiting for an event or a timeout.
+
+import array
+import os
+import select
+import sys
+import threading
+import time
+
+from collections import deque
+
+# Edge types; gpio.py's RISING, FALLING and BOTH are these plus _EDGE_OFFSET
+NO_EDGE = 0
+RISING_EDGE = 1
+FALLING_EDGE = 2
+BOTH_EDGE = 3
+
+# Policies of CallbackExecutor for a channel whose queue is full
+BLOCK = 0
+DROP_OLDEST = 1
+COALESCE = 2
+
+# Default maximum number of events read from a request at once
+MAX_EVENTS = 64
+
+_lock = threading.Lock()
+# Notified when the dispatcher is done with the request it was handling
+_idle = threading.Condition(_lock)
+_epoll = None
+_thread = None
+_stop_event = None
+# Write end of the pipe waking the dispatcher thread up
+_wakeup_fd = None
+# The request whose events the dispatcher thread is reading or handling
+_busy = None
+# Map from the file descriptor of each registered line request to the
+# (line_request, handler, max_events, deadline) tuple, and from each request to
+# its file descriptor, as the descriptor of a released request can no longer be
+# read
+_requests = {}
+_request_fds = {}
+
+
+class RecordBuffer(object):
+    """Fixed size ring buffer of records made of one number per column, kept
+    in preallocated arrays of the given typecodes. When the buffer is full,
+    new records overwrite the oldest if overwrite is True, and are dropped
+    otherwise; dropped counts the records lost either way."""
+
+    def __init__(self, capacity, overwrite, typecodes):
+        self.capacity = capacity
+        self.overwrite = overwrite
+        self.dropped = 0
+        self._columns = tuple(
+            array.array(t, bytes(array.array(t).itemsize * capacity)) for t in typecodes
+        )
+        self._start = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def extend(self, records):
+        """Add records given as one array per column, oldest first."""
+        capacity = self.capacity
+        count = len(records[0])
+        with self._lock:
+            free = capacity - self._count
+            if count > free:
+                if self.overwrite:
+                    # Only the newest capacity records can be kept; make room
+                    # for them by discarding the oldest records
+                    kept = min(count, capacity)
+                    discard = kept - free
+                    self._start = (self._start + discard) % capacity
+                    self._count -= discard
+                    self.dropped += count - free
+                    records = [r[count - kept :] for r in records]
+                    count = kept
+                else:
+                    self.dropped += count - free
+                    records = [r[:free] for r in records]
+                    count = free
+            if not count:
+                return
+
+            # Copy the records in at most two slices, the second one when the
+            # end of the buffer is reached
+            pos = (self._start + self._count) % capacity
+            first = min(count, capacity - pos)
+            for buffer, column in zip(self._columns, records):
+                buffer[pos : pos + first] = column[:first]
+                buffer[: count - first] = column[first:]
+            self._count += count
+
+    def drain(self):
+        """Remove all records from the buffer and return them, oldest first,
+        as one array per column."""
+        with self._lock:
+            start = self._start
+            end = start + self._count
+            records = []
+            for a in self._columns:
+                if end <= self.capacity:
+                    records.append(a[start:end])
+                else:
+                    records.append(a[start:] + a[: end - self.capacity])
+            self._start = 0
+            self._count = 0
+        return tuple(records)
+
+
+class EventRecorder(RecordBuffer):
+    """Ring buffer of the (timestamp_ns, edge, seqno) records of the edge
+    events of a line."""
+
+    def __init__(self, capacity, overwrite=True):
+        super(EventRecorder, self).__init__(capacity, overwrite, "QBQ")
+
+    def append(self, events, rising_type):
+        """Record the gpiod edge events, rising_type being the event type of
+        rising edges."""
+        # Convert only the events that can be kept
+        if len(events) > self.capacity and self.overwrite:
+            self.dropped += len(events) - self.capacity
+            events = events[-self.capacity :]
+        self.extend(
+            (
+                array.array("Q", [e.timestamp_ns for e in events]),
+                array.array(
+                    "B",
+                    [
+                        RISING_EDGE if e.event_type == rising_type else FALLING_EDGE
+                        for e in events
+                    ],
+                ),
+                array.array("Q", [e.line_seqno for e in events]),
+            )
+        )
+
+
+class PulseRecorder(RecordBuffer):
+    """Ring buffer of the (start_ns, width_ns, level) records of the pulses
+    of a line, a pulse lasting from an edge to the next edge of the other
+    kind. level is 1 for high pulses and 0 for low ones. The width of the
+    latest pulse of each level is kept in high_ns and low_ns, along with
+    the period and duty cycle made of the two."""
+
+    def __init__(self, capacity, overwrite=True):
+        super(PulseRecorder, self).__init__(capacity, overwrite, "QQB")
+        self.high_ns = 0
+        self.low_ns = 0
+        # Timestamp of the last edge seen and whether it was rising
+        self._last_ns = None
+        self._last_rising = None
+
+    def append(self, events, rising_type):
+        starts = []
+        widths = []
+        levels = []
+        last_ns = self._last_ns
+        last_rising = self._last_rising
+        for e in events:
+            timestamp_ns = e.timestamp_ns
+            rising = e.event_type == rising_type
+            # Two edges of the same kind in a row mean that an edge was
+            # missed, and an edge older than the previous one that the event
+            # clock was set back; the pulse in between is unknown either way
+            if (
+                last_ns is not None
+                and rising != last_rising
+                and timestamp_ns >= last_ns
+            ):
+                starts.append(last_ns)
+                widths.append(timestamp_ns - last_ns)
+                levels.append(last_rising)
+            last_ns = timestamp_ns
+            last_rising = rising
+        self._last_ns = last_ns
+        self._last_rising = last_rising
+
+        if not starts:
+            return
+        for width, level in zip(reversed(widths), reversed(levels)):
+            if level:
+                self.high_ns = width
+                break
+        for width, level in zip(reversed(widths), reversed(levels)):
+            if not level:
+                self.low_ns = width
+                break
+        self.extend(
+            (
+                array.array("Q", starts),
+                array.array("Q", widths),
+                array.array("B", levels),
+            )
+        )
+
+    @property
+    def period_ns(self):
+        if not self.high_ns or not self.low_ns:
+            return 0
+        return self.high_ns + self.low_ns
+
+    @property
+    def duty_cycle(self):
+        """Share of the period spent high, in percent."""
+        period_ns = self.period_ns
+        if not period_ns:
+            return 0.0
+        return self.high_ns * 100.0 / period_ns
+
+
+class EventTally(object):
+    """Counts of the edge events read from a line (delivered) and of those
+    the kernel dropped because its event buffer was full (lost). Lost events
+    are found from the gaps in the line sequence numbers of the events read,
+    which keep counting the events the kernel drops."""
+
+    def __init__(self):
+        self.delivered = 0
+        self.lost = 0
+        # The kernel numbers the events of a line from 1
+        self._last_seqno = 0
+
+    def append(self, events):
+        if not events:
+            return
+        first = events[0].line_seqno
+        last = events[-1].line_seqno
+        if first > self._last_seqno:
+            self.lost += first - self._last_seqno - 1
+        else:
+            # The numbering started over as the line was requested again
+            self.lost += first - 1
+        self.lost += last - first + 1 - len(events)
+        self.delivered += len(events)
+        self._last_seqno = last
+
+
+class EventLatch(object):
+    """Latch of the edge events of a line for event_detected(). The thread
+    reading the events adds to count and the polling thread only moves seen
+    up to it, so that neither loses the updates of the other."""
+
+    def __init__(self):
+        self.count = 0
+        self.seen = 0
+
+    def take(self):
+        """Return the number of events added since the last call."""
+        count = self.count
+        new = count - self.seen
+        self.seen = count
+        return new
+
+
+class Debouncer(object):
+    """Software debounce of the edge events of a line, for lines whose
+    controller does not debounce them. The line is taken to have settled once
+    no edge follows the last one for period_ns, going by the kernel
+    timestamps of the events, and that last edge is passed on if it changes
+    the settled level, so the edges passed on alternate between rising and
+    falling. settled_type is the event type of the edge to the level of the
+    line when the debounce starts, if known. dropped counts the events not
+    passed on."""
+
+    def __init__(self, period_ns, settled_type=None):
+        self.period_ns = period_ns
+        self.dropped = 0
+        # The last edge, not passed on until it has been stable for period_ns,
+        # and the type of the last edge passed on
+        self._pending = None
+        self._settled_type = settled_type
+
+    def filter(self, events, now_ns):
+        """Return the list of the edges that have settled by now_ns, on the
+        clock of the event timestamps, among events and the pending edge."""
+        period_ns = self.period_ns
+        pending = self._pending
+        kept = []
+        for e in events:
+            if pending is not None:
+                if e.timestamp_ns - pending.timestamp_ns >= period_ns:
+                    self._settle(pending, kept)
+                else:
+                    self.dropped += 1
+            pending = e
+        if pending is not None and now_ns - pending.timestamp_ns >= period_ns:
+            self._settle(pending, kept)
+            pending = None
+        self._pending = pending
+        return kept
+
+    def _settle(self, event, kept):
+        if event.event_type == self._settled_type:
+            # The bounces came back to the settled level
+            self.dropped += 1
+        else:
+            kept.append(event)
+            self._settled_type = event.event_type
+
+    def deadline(self):
+        """Return the time at which the pending edge settles, on the clock of
+        the event timestamps, or None if there is no pending edge."""
+        pending = self._pending
+        if pending is None:
+            return None
+        return pending.timestamp_ns + self.period_ns
+
+
+class EdgeCounter(object):
+    """Count of the edge events of a line, with the rate of the events over
+    the last window_ns nanoseconds computed from their kernel timestamps.
+    Only the first and last event of each batch are looked at, so the cost
+    per event is nearly nil."""
+
+    def __init__(self, window_ns):
+        self.window_ns = window_ns
+        self.count = 0
+        # (timestamp_ns, count) pairs, count being the number of events
+        # counted up to and including the event at timestamp_ns
+        self._marks = deque()
+        self._lock = threading.Lock()
+
+    def append(self, events):
+        if not events:
+            return
+        with self._lock:
+            marks = self._marks
+            marks.append((events[0].timestamp_ns, self.count + 1))
+            self.count += len(events)
+            last_ns = events[-1].timestamp_ns
+            if len(events) > 1:
+                marks.append((last_ns, self.count))
+            while marks[0][0] < last_ns - self.window_ns:
+                marks.popleft()
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+            self._marks.clear()
+
+    def frequency(self, now_ns):
+        """Return the rate in Hz of the events of the window ending at now_ns,
+        on the clock of the event timestamps."""
+        with self._lock:
+            marks = self._marks
+            while marks and marks[0][0] < now_ns - self.window_ns:
+                marks.popleft()
+            if len(marks) < 2:
+                return 0.0
+            first_ns, first_count = marks[0]
+            last_ns, last_count = marks[-1]
+        if last_ns == first_ns:
+            return 0.0
+        return (last_count - first_count) * 1e9 / (last_ns - first_ns)
+
+
+class CallbackExecutor(object):
+    """Pool of worker threads running the callbacks of edge events, so that
+    slow callbacks do not delay reading events. Jobs are queued per key (the
+    channel) and the jobs of a key are run one at a time, in order. When the
+    queue of a key holds queue_size jobs, submit() follows policy: BLOCK waits
+    for room, DROP_OLDEST discards the oldest job and COALESCE replaces the
+    newest job with the new one."""
+
+    def __init__(self, workers, queue_size, policy):
+        self.queue_size = queue_size
+        self.policy = policy
+        self._lock = threading.Lock()
+        self._work = threading.Condition(self._lock)
+        self._room = threading.Condition(self._lock)
+        self._queues = {}
+        # Map from each key to its [dropped, coalesced] counters
+        self._counters = {}
+        # Keys with jobs waiting for a worker, and keys that are either
+        # waiting or being run
+        self._ready = deque()
+        self._scheduled = set()
+        # Map from the keys whose jobs are being run to the worker running
+        # them, and condition notified when a job returns
+        self._running = {}
+        self._done = threading.Condition(self._lock)
+        # Keys whose jobs are refused until they are forgotten
+        self._closed = set()
+        self._stopped = False
+        self._threads = []
+        for i in range(workers):
+            t = threading.Thread(target=self._worker, name="TI.GPIO callbacks %d" % i)
+            t.daemon = True
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, key, fn, *args):
+        with self._lock:
+            if key in self._closed:
+                return
+            queue = self._queues.get(key)
+            if queue is None:
+                queue = self._queues[key] = deque()
+                self._counters[key] = [0, 0]
+            while len(queue) >= self.queue_size and not self._stopped:
+                if self.policy == DROP_OLDEST:
+                    queue.popleft()
+                    self._counters[key][0] += 1
+                elif self.policy == COALESCE:
+                    queue.pop()
+                    self._counters[key][1] += 1
+                else:
+                    self._room.wait()
+                    if self._queues.get(key) is not queue:
+                        # close() or forget() was called for the key meanwhile
+                        return
+            if self._stopped:
+                return
+            queue.append((fn, args))
+            if key not in self._scheduled:
+                self._scheduled.add(key)
+                self._ready.append(key)
+                self._work.notify()
+
+    def stats(self, key):
+        """Return the (depth, dropped, coalesced) counters of key."""
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue is None:
+                return 0, 0, 0
+            dropped, coalesced = self._counters[key]
+            return len(queue), dropped, coalesced
+
+    def close(self, key):
+        """Discard the pending jobs of key and refuse new ones until key is
+        forgotten, waking a submit() waiting for room for key."""
+        with self._lock:
+            self._closed.add(key)
+            queue = self._queues.pop(key, None)
+            if queue is not None:
+                queue.clear()
+            self._room.notify_all()
+
+    def forget(self, key):
+        """Discard the pending jobs and the counters of key, and wait for the
+        job of key being run to return unless called from that job."""
+        with self._lock:
+            self._closed.discard(key)
+            queue = self._queues.pop(key, None)
+            if queue is not None:
+                queue.clear()
+            self._counters.pop(key, None)
+            self._room.notify_all()
+            current = threading.current_thread()
+            while self._running.get(key) not in (None, current):
+                self._done.wait()
+
+    def shutdown(self):
+        """Discard the pending jobs and join the workers once the jobs being
+        run return."""
+        with self._lock:
+            self._stopped = True
+            self._queues.clear()
+            self._ready.clear()
+            self._work.notify_all()
+            self._room.notify_all()
+        for t in self._threads:
+            if t is not threading.current_thread():
+                t.join()
+
+    def _worker(self):
+        while True:
+            with self._lock:
+                while not self._ready and not self._stopped:
+                    self._work.wait()
+                if self._stopped:
+                    return
+                key = self._ready.popleft()
+                queue = self._queues.get(key)
+                if not queue:
+                    self._scheduled.discard(key)
+                    continue
+                fn, args = queue.popleft()
+                self._running[key] = threading.current_thread()
+                self._room.notify_all()
+
+            try:
+                fn(*args)
+            except Exception:
+                sys.excepthook(*sys.exc_info())
+
+            with self._lock:
+                del self._running[key]
+                self._done.notify_all()
+                if self._queues.get(key):
+                    self._ready.append(key)
+                    self._work.notify()
+                else:
+                    self._scheduled.discard(key)
+
+
+def _poll_thread(epoll, wakeup_fd, stop_event):
+    global _busy
+
+    try:
+        while not stop_event.is_set():
+            try:
+                ready = epoll.poll(_poll_timeout())
+            except InterruptedError:
+                continue
+
+            fds = [fd for fd, _ in ready]
+            fds.extend(fd for fd in _expired() if fd not in fds)
+            for fd in fds:
+                if fd == wakeup_fd:
+                    os.read(wakeup_fd, 64)
+                    continue
+                with _lock:
+                    if stop_event.is_set():
+                        break
+                    entry = _requests.get(fd)
+                    if entry is None:
+                        continue
+                    # remove_request() waits for the request to be handled
+                    # before returning, so it is not released under us
+                    _busy = entry[0]
+                line_request, handler, max_events, deadline = entry
+                try:
+                    _handle(line_request, handler, max_events, deadline)
+                finally:
+                    with _lock:
+                        _busy = None
+                        _idle.notify_all()
+    finally:
+        epoll.close()
+        os.close(wakeup_fd)
+
+
+def _poll_timeout():
+    """Return the time in seconds until the earliest deadline of the
+    registered requests, or None if none has a deadline."""
+    earliest = None
+    with _lock:
+        for entry in _requests.values():
+            deadline = entry[3]
+            at = None if deadline is None else deadline()
+            if at is not None and (earliest is None or at < earliest):
+                earliest = at
+    if earliest is None:
+        return None
+    return max(earliest - time.monotonic_ns(), 0) / 1e9
+
+
+def _expired():
+    """Return the file descriptors of the registered requests whose deadline
+    has passed."""
+    now_ns = time.monotonic_ns()
+    expired = []
+    with _lock:
+        for fd, entry in _requests.items():
+            deadline = entry[3]
+            at = None if deadline is None else deadline()
+            if at is not None and at <= now_ns:
+                expired.append(fd)
+    return expired
+
+
+def _handle(line_request, handler, max_events, deadline):
+    try:
+        # The events may have been read since the poll by a request handed
+        # over to another reader; never block here
+        if line_request.wait_edge_events(0):
+            events = line_request.read_edge_events(max_events)
+        elif deadline is not None:
+            # Woken up for the deadline of the request
+            events = []
+        else:
+            return
+    except Exception:
+        # The request has been released without being removed; forget it
+        remove_request(line_request)
+        return
+    try:
+        handler(events)
+    except Exception:
+        # Report the error without stopping the events of the other requests
+        sys.excepthook(*sys.exc_info())
+
+
+def _start():
+    global _epoll, _thread, _stop_event, _wakeup_fd
+
+    _epoll = select.epoll()
+    read_fd, _wakeup_fd = os.pipe()
+    _epoll.register(read_fd, select.EPOLLIN)
+    _stop_event = threading.Event()
+    _thread = threading.Thread(
+        target=_poll_thread,
+        args=(_epoll, read_fd, _stop_event),
+        name="TI.GPIO events",
+    )
+    _thread.daemon = True
+    _thread.start()
+
+
+def _stop():
+    """Stop the dispatcher thread, which closes its epoll object and the read
+    end of the pipe when it wakes up. Called with _lock held; the thread is
+    returned to be joined once _lock is released."""
+    global _epoll, _thread, _stop_event, _wakeup_fd
+
+    thread = _thread
+    _stop_event.set()
+    os.write(_wakeup_fd, b"\0")
+    os.close(_wakeup_fd)
+    _epoll = None
+    _thread = None
+    _stop_event = None
+    _wakeup_fd = None
+    return thread
+
+
+def _join(thread):
+    # A handler may stop the dispatcher from its own thread, which then exits
+    # when the handler returns
+    if thread is not None and thread is not threading.current_thread():
+        thread.join()
+
+
+def add_request(line_request, handler, max_events=MAX_EVENTS, deadline=None):
+    """Call handler with the list of edge events read from line_request
+    whenever it has events pending, reading up to max_events at once. If
+    deadline is given, it returns the time.monotonic_ns() time at which
+    handler is to be called with an empty list if no events came before, or
+    None. A request that is already registered has its handler replaced."""
+    with _lock:
+        if _thread is None:
+            _start()
+        fd = _request_fds.get(line_request)
+        if fd is None:
+            fd = line_request.fd
+            _epoll.register(fd, select.EPOLLIN)
+            _request_fds[line_request] = fd
+        _requests[fd] = (line_request, handler, max_events, deadline)
+
+
+def remove_request(line_request):
+    """Stop dispatching the events of line_request. This must be done before
+    the request is released, and waits for the dispatcher to be done with
+    the events of the request it may be handling, unless called from the
+    handler. The dispatcher thread is stopped and joined once no requests are
+    left."""
+    thread = None
+    with _lock:
+        fd = _request_fds.pop(line_request, None)
+        if fd is None:
+            return
+        del _requests[fd]
+        try:
+            _epoll.unregister(fd)
+        except OSError:
+            # Already released, which removes the descriptor from the epoll
+            pass
+        if _thread is not threading.current_thread():
+            while _busy is line_request:
+                _idle.wait()
+        if not _requests:
+            thread = _stop()
+    _join(thread)
+
+
+def is_registered(line_request):
+    with _lock:
+        return line_request in _request_fds
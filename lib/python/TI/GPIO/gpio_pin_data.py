@@ -329,22 +329,104 @@ board_gpio_data = {
 
 
 class ChannelInfo(object):
-    def __init__(self, channel, gpiochip, gpio, pwm_chip_dir, pwm_id):
-        self.channel = channel
+    """Description of one physical header pin. There is a single record per
+    pin, shared by all numbering modes; channel is the name of the pin in the
+    mode currently selected on the PinTable that owns the record."""
+
+    __slots__ = (
+        "_table",
+        "names",
+        "gpiochip",
+        "gpio",
+        "pwm_chip_dir",
+        "pwm_id",
+        "f_duty_cycle",
+    )
+
+    def __init__(self, table, names, gpiochip, gpio, pwm_chip_dir, pwm_id):
+        self._table = table
+        self.names = names
         self.gpiochip = gpiochip
         self.gpio = gpio
         self.pwm_chip_dir = pwm_chip_dir
         self.pwm_id = pwm_id
+        self.f_duty_cycle = None
+
+    @property
+    def channel(self):
+        return self.names[self._table.column]
+
+
+class PinTable(object):
+    """All pins of a board, stored once in a tuple of ChannelInfo records,
+    with a lookup index per numbering mode. Each row passed in is
+    (BOARD, BCM, SOC name, gpiochip, gpio offset, pwm_chip_dir, pwm_id)."""
+
+    __slots__ = ("pins", "column", "_indexes")
+
+    def __init__(self, rows):
+        self.pins = tuple(
+            ChannelInfo(self, (x[0], x[1], x[2]), x[3], x[4], x[5], x[6]) for x in rows
+        )
+        self.column = 0
+        self._indexes = [None] * len(_mode_names)
+
+    def index(self, mode_name):
+        """Select mode_name as the active numbering mode and return the
+        dictionary mapping its channel names to pin records. The index of a
+        mode is built the first time the mode is selected."""
+        column = _mode_names.index(mode_name)
+        index = self._indexes[column]
+        if index is None:
+            index = {x.names[column]: x for x in self.pins}
+            self._indexes[column] = index
+        self.column = column
+        return index
+
+    def rows(self):
+        return [
+            list(x.names) + [x.gpiochip, x.gpio, x.pwm_chip_dir, x.pwm_id]
+            for x in self.pins
+        ]
 
 
 ids_warned = False
 
+# Numbering modes, in the order their names are stored in ChannelInfo.names
+_mode_names = ("BOARD", "BCM", "SOC")
+
+
+compatible_path = "/proc/device-tree/compatible"
+boot_id_path = "/proc/sys/kernel/random/boot_id"
+
+# Directories searched for the PWM controllers of a board
+sysfs_prefixes = [
+    "/sys/devices/",
+    "/sys/devices/platform/",
+    "/sys/devices/platform/bus@100000/",
+    "/sys/devices/platform/bus@100000/bus@100000:bus@28380000/",
+    "/sys/devices/platform/bus@f0000/",
+]
+
+# The resolved board layout can optionally be cached on disk, so that processes
+# started later during the same boot do not have to walk sysfs again. Caching
+# is enabled by pointing TI_GPIO_CACHE_DIR at a writable directory, typically
+# /run/ti-gpio.
+cache_dir = os.environ.get("TI_GPIO_CACHE_DIR")
+cache_file_name = "board-data.json"
 
-def get_data():
-    compatible_path = "/proc/device-tree/compatible"
 
+def read_compatible():
     with open(compatible_path, "r") as f:
-        compatibles = f.read().split("\x00")
+        return f.read()
+
+
+def get_model(compatible=None):
+    """Detect the board from the device tree. Returns the model name, the
+    board information dictionary and the pin definitions of the board."""
+    if compatible is None:
+        compatible = read_compatible()
+    compatibles = compatible.split("\x00")
 
     def matches(vals):
         return any(v in compatibles for v in vals)
@@ -366,15 +448,14 @@ def get_data():
         raise Exception("Could not determine TI SOC model")
 
     pin_defs, board_info = board_gpio_data[model]
-    pwm_dirs = {}
+    return model, board_info, pin_defs
+
 
-    sysfs_prefixes = [
-        "/sys/devices/",
-        "/sys/devices/platform/",
-        "/sys/devices/platform/bus@100000/",
-        "/sys/devices/platform/bus@100000/bus@100000:bus@28380000/",
-        "/sys/devices/platform/bus@f0000/",
-    ]
+def get_pwm_dirs(pin_defs):
+    """Locate the sysfs pwmchip directory of every PWM controller used by
+    pin_defs. Returns a dictionary mapping the controller name to the
+    directory; controllers that are not enabled are left out."""
+    pwm_dirs = {}
 
     pwm_chip_names = set(
         [x[PWM_SYSFS_DIR_ENTRY] for x in pin_defs if x[PWM_SYSFS_DIR_ENTRY] is not None]
@@ -401,22 +482,81 @@ def get_data():
             pwm_dirs[pwm_chip_name] = pwm_chip_pwm_pwmchipn_dir
             break
 
-    def model_data(key_col, pin_defs):
-        return {
-            x[key_col]: ChannelInfo(
-                x[key_col],
-                x[GPIO_CHIP_ENTRY],
-                x[OFFSET_ENTRY],
-                pwm_chip_dir=pwm_dirs.get(x[PWM_SYSFS_DIR_ENTRY], None),
-                pwm_id=x[PWM_ID_ENTRY],
-            )
-            for x in pin_defs
-        }
-
-    channel_data = {
-        "BOARD": model_data(BOARD_PIN_ENTRY, pin_defs),
-        "BCM": model_data(BCM_PIN_ENTRY, pin_defs),
-        "SOC": model_data(SOC_NAME_ENTRY, pin_defs),
-    }
-
-    return model, board_info, channel_data
+    return pwm_dirs
+
+
+def get_pin_table(pin_defs, pwm_dirs):
+    """Build the PinTable of a board from its pin definitions."""
+    return PinTable(
+        (
+            x[BOARD_PIN_ENTRY],
+            x[BCM_PIN_ENTRY],
+            x[SOC_NAME_ENTRY],
+            x[GPIO_CHIP_ENTRY],
+            x[OFFSET_ENTRY],
+            pwm_dirs.get(x[PWM_SYSFS_DIR_ENTRY], None),
+            x[PWM_ID_ENTRY],
+        )
+        for x in pin_defs
+    )
+
+
+def cache_key(compatible, version):
+    """Return the key identifying cached board data. The cache is only valid
+    for the device tree, kernel boot and library version it was built with."""
+    try:
+        with open(boot_id_path, "r") as f:
+            boot_id = f.read().strip()
+    except OSError:
+        boot_id = None
+    return {"compatible": compatible, "boot_id": boot_id, "version": version}
+
+
+def read_cache(key):
+    """Return the cached board data matching key, or None if caching is
+    disabled or there is no valid cache entry."""
+    if not cache_dir:
+        return None
+
+    # json is only imported here and in write_cache(), as importing it takes
+    # longer than importing the rest of TI.GPIO
+    import json
+
+    try:
+        with open(os.path.join(cache_dir, cache_file_name), "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(data, dict) or data.get("key") != key:
+        return None
+    return data
+
+
+def write_cache(data):
+    """Atomically replace the cache file with data. Failures are ignored as
+    the cache is only an optimization."""
+    if not cache_dir:
+        return
+
+    import json
+
+    path = os.path.join(cache_dir, cache_file_name)
+    tmp_path = "%s.%d" % (path, os.getpid())
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+def get_data():
+    model, board_info, pin_defs = get_model()
+    pin_table = get_pin_table(pin_defs, get_pwm_dirs(pin_defs))
+
+    return model, board_info, pin_table
@@ -0,0 +1,520 @@
+# Copyright (c) 2021-2023, Texas Instruments Incorporated. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# In-process simulation of the subset of the gpiod (libgpiod v2) Python API
+# used by gpio.py, together with a fake device tree and PWM sysfs tree. It is
+# selected with GPIO.setbackend("sim") or TI_GPIO_BACKEND=sim, and allows the
+# library, the samples and the benchmarks to run on a machine without GPIO
+# hardware. The board that is simulated is chosen with TI_GPIO_SIM_MODEL and
+# defaults to the J721E SK.
+#
+# Input levels are driven from the outside with set_input(); edge events are
+# queued on the line request in the same way the kernel does it, with
+# timestamps, global and per-line sequence numbers and a bounded queue that
+# drops the oldest event on overflow.
+
+import atexit
+import errno
+import os
+import select
+import shutil
+import tempfile
+import threading
+import time
+
+from collections import deque
+from datetime import timedelta
+from enum import Enum
+
+from TI.GPIO import gpio_pin_data
+
+
+class Direction(Enum):
+    AS_IS = 1
+    INPUT = 2
+    OUTPUT = 3
+
+
+class Value(Enum):
+    INACTIVE = 0
+    ACTIVE = 1
+
+
+class Edge(Enum):
+    NONE = 1
+    RISING = 2
+    FALLING = 3
+    BOTH = 4
+
+
+class RequestReleasedError(Exception):
+    def __init__(self):
+        super().__init__("GPIO lines have been released")
+
+
+class LineSettings(object):
+    def __init__(
+        self,
+        direction=Direction.AS_IS,
+        edge_detection=Edge.NONE,
+        bias=None,
+        drive=None,
+        active_low=False,
+        debounce_period=timedelta(),
+        event_clock=None,
+        output_value=Value.INACTIVE,
+    ):
+        self.direction = direction
+        self.edge_detection = edge_detection
+        self.bias = bias
+        self.drive = drive
+        self.active_low = active_low
+        self.debounce_period = debounce_period
+        self.event_clock = event_clock
+        self.output_value = output_value
+
+
+class LineInfo(object):
+    def __init__(self, line, chip):
+        self.offset = line.offset
+        self.name = None
+        self.used = line.request is not None
+        self.consumer = line.consumer
+        self.direction = line.direction
+        self.active_low = False
+        self.bias = None
+        self.drive = None
+        self.edge_detection = line.edge
+        self.event_clock = None
+        debounce_us = line.debounce_ns // 1000 if chip.debounce_supported else 0
+        self.debounced = debounce_us != 0
+        self.debounce_period = timedelta(microseconds=debounce_us)
+
+
+class EdgeEvent(object):
+    class Type(Enum):
+        RISING_EDGE = 1
+        FALLING_EDGE = 2
+
+    __slots__ = (
+        "event_type",
+        "timestamp_ns",
+        "line_offset",
+        "global_seqno",
+        "line_seqno",
+    )
+
+    def __init__(self, event_type, timestamp_ns, line_offset, global_seqno, line_seqno):
+        self.event_type = event_type
+        self.timestamp_ns = timestamp_ns
+        self.line_offset = line_offset
+        self.global_seqno = global_seqno
+        self.line_seqno = line_seqno
+
+
+class _SimLine(object):
+    __slots__ = (
+        "offset",
+        "level",
+        "external",
+        "direction",
+        "edge",
+        "debounce_ns",
+        "last_change_ns",
+        "request",
+        "consumer",
+        "seqno",
+    )
+
+    def __init__(self, offset):
+        self.offset = offset
+        self.level = 0
+        self.external = 0
+        self.direction = Direction.INPUT
+        self.edge = Edge.NONE
+        self.debounce_ns = 0
+        self.last_change_ns = None
+        self.request = None
+        self.consumer = None
+        self.seqno = 0
+
+
+class _SimChip(object):
+    def __init__(self, num, num_lines=128):
+        self.num = num
+        self.lines = [_SimLine(i) for i in range(num_lines)]
+        # Set to False to model a controller without hardware debounce: the
+        # debounce period is accepted but not applied, and reads back as 0
+        self.debounce_supported = True
+
+
+_lock = threading.RLock()
+_chips = {}
+_root_dir = None
+_pwm_writes = []
+# Number of operations that are an ioctl on the hardware, and of gpiochips
+# opened, for benchmarks
+stats = {"ioctls": 0, "opens": 0}
+
+# Kernel defaults for the edge event queue of a line request
+_EVENT_BUFFER_PER_LINE = 16
+_EVENT_BUFFER_MAX = 1024
+
+_compats = {
+    gpio_pin_data.J721E_SK: gpio_pin_data.compats_j721e,
+    gpio_pin_data.AM68_SK: gpio_pin_data.compats_am68sk,
+    gpio_pin_data.AM69_SK: gpio_pin_data.compats_am69sk,
+    gpio_pin_data.AM62A_SK: gpio_pin_data.compats_am62ask,
+    gpio_pin_data.AM62P_SK: gpio_pin_data.compats_am62psk,
+    gpio_pin_data.J722S_EVM: gpio_pin_data.compats_j722sevm,
+}
+
+
+def _chip_from_path(path):
+    prefix = "/dev/gpiochip"
+    if not str(path).startswith(prefix):
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+    num = int(str(path)[len(prefix) :])
+    return chip(num)
+
+
+def _timeout_seconds(timeout):
+    if isinstance(timeout, timedelta):
+        return timeout.total_seconds()
+    return timeout
+
+
+def _offsets_of(key):
+    if isinstance(key, int):
+        return [key]
+    return list(key)
+
+
+def chip(num):
+    """Return the simulated gpiochip number num, creating it if needed."""
+    with _lock:
+        c = _chips.get(num)
+        if c is None:
+            c = _chips[num] = _SimChip(num)
+        return c
+
+
+def set_input(chip_num, offset, value, timestamp_ns=None):
+    """Drive the external level of a line. If the line is a requested input
+    with edge detection enabled, an edge event is queued on its request."""
+    value = 1 if value else 0
+    if timestamp_ns is None:
+        timestamp_ns = time.monotonic_ns()
+
+    with _lock:
+        c = chip(chip_num)
+        line = c.lines[offset]
+        line.external = value
+        if line.direction != Direction.INPUT or line.level == value:
+            return
+        previous_ns = line.last_change_ns
+        line.last_change_ns = timestamp_ns
+        if (
+            c.debounce_supported
+            and line.debounce_ns
+            and previous_ns is not None
+            and timestamp_ns - previous_ns < line.debounce_ns
+        ):
+            # Bounce within the debounce period; the kernel would not report
+            # it and the debounced level does not change
+            return
+        line.level = value
+        if line.request is None:
+            return
+
+        rising = value == 1
+        if line.edge == Edge.BOTH or (
+            line.edge == (Edge.RISING if rising else Edge.FALLING)
+        ):
+            event_type = (
+                EdgeEvent.Type.RISING_EDGE if rising else EdgeEvent.Type.FALLING_EDGE
+            )
+            line.request._push_event(line, event_type, timestamp_ns)
+
+
+def get_output(chip_num, offset):
+    """Return the level currently driven on a line."""
+    with _lock:
+        return chip(chip_num).lines[offset].level
+
+
+class Chip(object):
+    def __init__(self, path):
+        self.path = path
+        self._chip = _chip_from_path(path)
+        stats["opens"] += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._chip = None
+
+    def get_line_info(self, line):
+        with _lock:
+            stats["ioctls"] += 1
+            return LineInfo(self._chip.lines[line], self._chip)
+
+    def request_lines(
+        self, config, consumer=None, event_buffer_size=None, output_values=None
+    ):
+        return request_lines(
+            self.path, config, consumer, event_buffer_size, output_values
+        )
+
+
+class LineRequest(object):
+    def __init__(self, path, chip, offsets, consumer, event_buffer_size):
+        self.chip_name = os.path.basename(str(path))
+        self._chip = chip
+        self.offsets = offsets
+        self.num_lines = len(offsets)
+        self.lines = offsets
+        self.consumer = consumer
+        if not event_buffer_size:
+            event_buffer_size = self.num_lines * _EVENT_BUFFER_PER_LINE
+        self._events = deque(maxlen=min(event_buffer_size, _EVENT_BUFFER_MAX))
+        self._global_seqno = 0
+        self._released = False
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+        self.fd = self._read_fd
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def fileno(self):
+        return self.fd
+
+    def _check_released(self):
+        if self._released:
+            raise RequestReleasedError()
+
+    def _line(self, offset):
+        if offset not in self.offsets:
+            raise ValueError("offset %s is not part of this request" % offset)
+        return self._chip.lines[offset]
+
+    def _apply(self, line, settings, output_value=None):
+        if settings is None:
+            settings = LineSettings()
+        if settings.direction != Direction.AS_IS:
+            line.direction = settings.direction
+        if settings.edge_detection != Edge.NONE:
+            line.direction = Direction.INPUT
+        if settings.direction == Direction.OUTPUT:
+            if output_value is None:
+                output_value = settings.output_value
+            line.level = 1 if output_value == Value.ACTIVE else 0
+        elif line.direction == Direction.INPUT:
+            line.level = line.external
+        line.edge = settings.edge_detection
+        line.debounce_ns = int(settings.debounce_period.total_seconds() * 1e9)
+        line.last_change_ns = None
+
+    def _push_event(self, line, event_type, timestamp_ns):
+        # Called with _lock held
+        self._global_seqno += 1
+        line.seqno += 1
+        was_empty = not self._events
+        # The deque drops the oldest entry when full, as the kernel does
+        self._events.append(
+            EdgeEvent(
+                event_type, timestamp_ns, line.offset, self._global_seqno, line.seqno
+            )
+        )
+        if was_empty:
+            os.write(self._write_fd, b"\x00")
+
+    def get_value(self, line):
+        self._check_released()
+        with _lock:
+            stats["ioctls"] += 1
+            return Value.ACTIVE if self._line(line).level else Value.INACTIVE
+
+    def get_values(self, lines=None):
+        self._check_released()
+        if lines is None:
+            lines = self.offsets
+        with _lock:
+            stats["ioctls"] += 1
+            return [
+                Value.ACTIVE if self._line(x).level else Value.INACTIVE for x in lines
+            ]
+
+    def set_value(self, line, value):
+        self.set_values({line: value})
+
+    def set_values(self, values):
+        self._check_released()
+        with _lock:
+            stats["ioctls"] += 1
+            for offset, value in values.items():
+                line = self._line(offset)
+                if line.direction == Direction.OUTPUT:
+                    line.level = 1 if value == Value.ACTIVE else 0
+
+    def reconfigure_lines(self, config):
+        self._check_released()
+        settings = {}
+        for key, value in config.items():
+            for offset in _offsets_of(key):
+                settings[offset] = value
+        with _lock:
+            stats["ioctls"] += 1
+            # As with the kernel, lines without settings return to defaults
+            for offset in self.offsets:
+                self._apply(self._chip.lines[offset], settings.get(offset))
+
+    def wait_edge_events(self, timeout=None):
+        self._check_released()
+        readable, _, _ = select.select(
+            [self._read_fd], [], [], _timeout_seconds(timeout)
+        )
+        return bool(readable)
+
+    def read_edge_events(self, max_events=None):
+        self._check_released()
+        while True:
+            with _lock:
+                if self._events:
+                    if max_events is None:
+                        max_events = len(self._events)
+                    count = min(max_events, len(self._events))
+                    events = [self._events.popleft() for _ in range(count)]
+                    if not self._events:
+                        try:
+                            os.read(self._read_fd, 4096)
+                        except BlockingIOError:
+                            pass
+                    return events
+            # Reading an empty kernel event queue blocks
+            select.select([self._read_fd], [], [])
+
+    def release(self):
+        if self._released:
+            return
+        with _lock:
+            for offset in self.offsets:
+                line = self._chip.lines[offset]
+                line.request = None
+                line.consumer = None
+                line.edge = Edge.NONE
+                line.debounce_ns = 0
+            self._released = True
+            self._events.clear()
+        os.close(self._write_fd)
+        os.close(self._read_fd)
+
+
+def request_lines(
+    path, config, consumer=None, event_buffer_size=None, output_values=None
+):
+    c = _chip_from_path(path)
+    settings = {}
+    for key, value in config.items():
+        for offset in _offsets_of(key):
+            settings[offset] = value
+    offsets = list(settings)
+
+    with _lock:
+        stats["ioctls"] += 1
+        for offset in offsets:
+            if c.lines[offset].request is not None:
+                raise OSError(errno.EBUSY, os.strerror(errno.EBUSY))
+        req = LineRequest(path, c, offsets, consumer, event_buffer_size)
+        for offset in offsets:
+            line = c.lines[offset]
+            line.request = req
+            line.consumer = consumer
+            line.seqno = 0
+            value = None
+            if output_values is not None:
+                value = output_values.get(offset)
+            req._apply(line, settings[offset], value)
+    return req
+
+
+def write_sysfs(path, value):
+    """Write a sysfs attribute of the fake PWM tree, emulating the side effects
+    of the export and unexport attributes."""
+    with open(path, "w") as f:
+        f.write(value)
+    _pwm_writes.append((path, value))
+
+    name = os.path.basename(path)
+    pwm_dir = os.path.join(os.path.dirname(path), "pwm" + value.strip())
+    if name == "export" and not os.path.exists(pwm_dir):
+        os.mkdir(pwm_dir)
+        for attr in ("period", "duty_cycle", "enable"):
+            with open(os.path.join(pwm_dir, attr), "w") as f:
+                f.write("0")
+    elif name == "unexport" and os.path.isdir(pwm_dir):
+        shutil.rmtree(pwm_dir)
+
+
+def install(model=None):
+    """Create the fake device tree and PWM sysfs tree of the simulated board and
+    point gpio_pin_data at them."""
+    global _root_dir
+
+    if _root_dir is not None:
+        return
+    if model is None:
+        model = os.environ.get("TI_GPIO_SIM_MODEL", gpio_pin_data.J721E_SK)
+    if model not in _compats:
+        raise ValueError("Unknown simulated model %s" % model)
+
+    _root_dir = tempfile.mkdtemp(prefix="ti-gpio-sim-")
+    atexit.register(shutil.rmtree, _root_dir, True)
+
+    dt_dir = os.path.join(_root_dir, "proc", "device-tree")
+    os.makedirs(dt_dir)
+    with open(os.path.join(dt_dir, "compatible"), "w") as f:
+        f.write("".join(x + "\x00" for x in _compats[model]))
+    gpio_pin_data.compatible_path = os.path.join(dt_dir, "compatible")
+
+    pin_defs = gpio_pin_data.board_gpio_data[model][0]
+    pwm_chips = sorted(
+        set(
+            x[gpio_pin_data.PWM_SYSFS_DIR_ENTRY]
+            for x in pin_defs
+            if x[gpio_pin_data.PWM_SYSFS_DIR_ENTRY] is not None
+        )
+    )
+    platform_dir = os.path.join(_root_dir, "sys", "devices", "platform")
+    for n, name in enumerate(pwm_chips):
+        pwmchip_dir = os.path.join(platform_dir, name, "pwm", "pwmchip%d" % (2 * n))
+        os.makedirs(pwmchip_dir)
+        for attr, value in (("npwm", "2"), ("export", ""), ("unexport", "")):
+            with open(os.path.join(pwmchip_dir, attr), "w") as f:
+                f.write(value)
+    gpio_pin_data.sysfs_prefixes = [_root_dir + x for x in gpio_pin_data.sysfs_prefixes]
@@ -0,0 +1,263 @@
+# Copyright (c) 2021-2023, Texas Instruments Incorporated. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+# gpiozero pin factory driving the pins with TI.GPIO directly. The 40-pin
+# header of the TI starter kits follows the layout of the Raspberry Pi one, so
+# pins are named as on a Raspberry Pi 4 Model B ("GPIO17", "BOARD11", or 17)
+# and numbered with GPIO.BCM. Each pin keeps a GPIO.line() handle to its line
+# for reads and writes, and its edges are delivered by the event dispatcher
+# of TI.GPIO along with their kernel timestamps. The factory is registered as
+# the "tigpio" gpiozero pin factory:
+#
+#     GPIOZERO_PIN_FACTORY=tigpio python3 app.py
+#
+# or can be given to devices explicitly:
+#
+#     from gpiozero import LED
+#     from TI.GPIO.pinfactory import TIGPIOFactory
+#
+#     factory = TIGPIOFactory()
+#     led = LED(17, pin_factory=factory)
+
+from gpiozero.exc import (
+    PinFixedPull,
+    PinInvalidBounce,
+    PinInvalidFunction,
+    PinInvalidPull,
+    PinInvalidState,
+    PinPWMFixedValue,
+    PinSetInput,
+)
+from gpiozero.pins.local import LocalPiFactory, LocalPiPin
+
+import TI.GPIO as GPIO
+
+# Revision code of the Raspberry Pi 4 Model B, whose header is used to name
+# the pins
+_REVISION = 0xB03111
+
+
+class TIGPIOFactory(LocalPiFactory):
+    """gpiozero pin factory of the TI starter kits, using TI.GPIO."""
+
+    def __init__(self):
+        super().__init__()
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setwarnings(False)
+        self.pin_class = TIGPIOPin
+        # GPIO.Port objects reading the pins given to states()
+        self._ports = {}
+
+    def close(self):
+        super().close()
+        self._ports.clear()
+        GPIO.cleanup()
+
+    def _get_revision(self):
+        return _REVISION
+
+    def states(self, pins):
+        """Return the states of pins, or of the devices with a pin such as the
+        devices of a CompositeDevice, as a tuple. The lines are read through a
+        GPIO.Port kept for the pins, with one call per line request; the lines
+        of a controller share one request only with GPIO.setlinegrouping(True).
+        gpiozero devices read their pins one at a time, so this is only used
+        when called explicitly."""
+        pins = tuple(getattr(p, "pin", p) for p in pins)
+        # The state of a pin driven by PWM is its duty cycle, and its channel
+        # cannot be part of a port
+        lines = tuple(p for p in pins if p._pwm is None)
+        value = 0
+        if lines:
+            port = self._ports.get(lines)
+            if port is None:
+                port = GPIO.Port([p._number for p in lines], None)
+                self._ports[lines] = port
+            value = port.read()
+        bits = {p: bit for bit, p in enumerate(lines)}
+        return tuple(
+            p._duty_cycle if p._pwm is not None else (value >> bits[p]) & 1
+            for p in pins
+        )
+
+    def _forget_pin(self, pin):
+        # Drop the ports reading a pin that is closed
+        for lines in [lines for lines in self._ports if pin in lines]:
+            del self._ports[lines]
+
+
+class TIGPIOPin(LocalPiPin):
+    """Pin of TIGPIOFactory."""
+
+    GPIO_PULL_UPS = {
+        "up": GPIO.PUD_UP,
+        "down": GPIO.PUD_DOWN,
+        "floating": GPIO.PUD_OFF,
+    }
+
+    GPIO_EDGES = {
+        "both": GPIO.BOTH,
+        "rising": GPIO.RISING,
+        "falling": GPIO.FALLING,
+    }
+
+    GPIO_EDGES_NAMES = {v: k for (k, v) in GPIO_EDGES.items()}
+
+    def __init__(self, factory, info):
+        super().__init__(factory, info)
+        self._pull = info.pull or "floating"
+        self._function = "input"
+        self._pwm = None
+        self._frequency = None
+        self._duty_cycle = None
+        self._bounce = None
+        self._edges = GPIO.BOTH
+        self._setup_input(self._pull)
+        # The handle follows the line of the pin through later setup() calls
+        self._line = GPIO.line(self._number)
+
+    def _setup_input(self, pull):
+        # TI.GPIO warns that it ignores pulls, which are set by the pinmux
+        if pull == "floating":
+            GPIO.setup(self._number, GPIO.IN)
+        else:
+            GPIO.setup(self._number, GPIO.IN, self.GPIO_PULL_UPS[pull])
+
+    def close(self):
+        self.frequency = None
+        self.when_changed = None
+        self._factory._forget_pin(self)
+        GPIO.cleanup(self._number)
+
+    def output_with_state(self, state):
+        self._pull = "floating"
+        GPIO.setup(self._number, GPIO.OUT, initial=GPIO.HIGH if state else GPIO.LOW)
+        self._function = "output"
+
+    def input_with_pull(self, pull):
+        if self.info.pull and pull != self.info.pull:
+            raise PinFixedPull(f"{self!r} has a fixed pull resistor")
+        if pull not in self.GPIO_PULL_UPS:
+            raise PinInvalidPull(f'invalid pull "{pull}" for pin {self!r}')
+        self._setup_input(pull)
+        self._pull = pull
+        self._function = "input"
+
+    def _get_function(self):
+        return self._function
+
+    def _set_function(self, value):
+        if value == "input":
+            self.input_with_pull(self._pull)
+        elif value == "output":
+            self.output_with_state(False)
+        else:
+            raise PinInvalidFunction(f'invalid function "{value}" for pin {self!r}')
+
+    def _get_state(self):
+        if self._pwm:
+            return self._duty_cycle
+        return self._line.value
+
+    def _set_state(self, value):
+        if self._pwm:
+            try:
+                self._pwm.ChangeDutyCycle(value * 100)
+            except ValueError:
+                raise PinInvalidState(f'invalid state "{value}" for pin {self!r}')
+            self._duty_cycle = value
+        else:
+            try:
+                self._line.value = value
+            except RuntimeError:
+                raise PinSetInput(f"cannot set state of pin {self!r}")
+
+    def _get_pull(self):
+        return self._pull
+
+    def _set_pull(self, value):
+        if self._function != "input":
+            raise PinFixedPull(f"cannot set pull on non-input pin {self!r}")
+        self.input_with_pull(value)
+
+    def _get_frequency(self):
+        return self._frequency
+
+    def _set_frequency(self, value):
+        if self._frequency is None and value is not None:
+            try:
+                self._pwm = GPIO.PWM(self._number, value)
+            except RuntimeError:
+                raise PinPWMFixedValue(f"cannot start PWM on pin {self!r}")
+            self._pwm.start(0)
+            self._duty_cycle = 0
+            self._frequency = value
+        elif self._frequency is not None and value is not None:
+            self._pwm.ChangeFrequency(value)
+            self._frequency = value
+        elif self._frequency is not None and value is None:
+            self._pwm.stop()
+            self._pwm = None
+            self._duty_cycle = None
+            self._frequency = None
+
+    def _get_bounce(self):
+        return None if self._bounce is None else self._bounce / 1000
+
+    def _set_bounce(self, value):
+        if value is not None and value < 0:
+            raise PinInvalidBounce("bounce must be 0 or greater")
+        f = self.when_changed
+        self.when_changed = None
+        try:
+            self._bounce = None if value is None else int(value * 1000)
+        finally:
+            self.when_changed = f
+
+    def _get_edges(self):
+        return self.GPIO_EDGES_NAMES[self._edges]
+
+    def _set_edges(self, value):
+        f = self.when_changed
+        self.when_changed = None
+        try:
+            self._edges = self.GPIO_EDGES[value]
+        finally:
+            self.when_changed = f
+
+    def _call_event(self, event):
+        # The kernel timestamps edges with CLOCK_MONOTONIC, the clock of the
+        # ticks of the factory, and the state after an edge follows from it
+        super()._call_when_changed(
+            event.timestamp_ns / 1e9, 1 if event.edge == GPIO.RISING else 0
+        )
+
+    def _enable_event_detect(self):
+        GPIO.add_event_detect(
+            self._number,
+            self._edges,
+            callback=self._call_event,
+            bouncetime=self._bounce,
+            with_event=True,
+        )
+
+    def _disable_event_detect(self):
+        GPIO.remove_event_detect(self._number)
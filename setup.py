@@ -47,4 +47,9 @@ setup(
     packages=["TI", "TI.GPIO", "RPi", "RPi.GPIO"],
     package_data={},
     include_package_data=True,
+    entry_points={
+        "gpiozero_pin_factories": [
+            "tigpio = TI.GPIO.pinfactory:TIGPIOFactory",
+        ],
+    },
 )
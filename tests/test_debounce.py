@@ -0,0 +1,100 @@
+# Copyright (c) 2021-2023, Texas Instruments Incorporated. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+import threading
+import time
+
+import TI.GPIO as GPIO
+from TI.GPIO import gpio, gpio_sim
+
+BOUNCETIME = 10
+
+
+def debounced_in_software(channel):
+    ch_info = gpio._channel_data[channel]
+    gpio_sim.chip(ch_info.gpiochip).debounce_supported = False
+    gpio_sim.set_input(ch_info.gpiochip, ch_info.gpio, 0)
+    GPIO.setup(channel, GPIO.IN)
+    return ch_info
+
+
+def drive(ch_info, levels, step_ns=1000000):
+    start_ns = time.monotonic_ns()
+    for i, level in enumerate(levels):
+        gpio_sim.set_input(
+            ch_info.gpiochip, ch_info.gpio, level, timestamp_ns=start_ns + i * step_ns
+        )
+
+
+def settle():
+    time.sleep(3 * BOUNCETIME / 1000)
+
+
+def detect_edges(channel):
+    edges = []
+    GPIO.add_event_detect(
+        channel,
+        GPIO.BOTH,
+        callback=lambda e: edges.append(e.edge),
+        bouncetime=BOUNCETIME,
+        with_event=True,
+    )
+    return edges
+
+
+def test_burst_ending_on_opposite_level(board):
+    ch_info = debounced_in_software(18)
+    edges = detect_edges(18)
+
+    # The line goes high and comes back low within the bounce time: the level
+    # has not changed, and the next rising edge is the only one passed on
+    drive(ch_info, [1, 0, 1, 0])
+    settle()
+    assert edges == []
+
+    drive(ch_info, [1])
+    settle()
+    assert edges == [GPIO.RISING]
+    assert GPIO.event_stats(18)["debounce_dropped"] == 4
+
+
+def test_burst_passes_on_last_edge(board):
+    ch_info = debounced_in_software(18)
+    edges = detect_edges(18)
+
+    drive(ch_info, [1, 0, 1, 0, 1])
+    settle()
+    drive(ch_info, [0, 1, 0])
+    settle()
+    assert edges == [GPIO.RISING, GPIO.FALLING]
+
+
+def test_wait_for_edge_returns_once_settled(board):
+    ch_info = debounced_in_software(18)
+
+    # No edge follows the burst; the wait returns once it has settled
+    timer = threading.Timer(0.05, drive, (ch_info, [1, 0, 1]))
+    timer.start()
+    try:
+        count = GPIO.wait_for_edge(18, GPIO.BOTH, bouncetime=BOUNCETIME, timeout=1000)
+    finally:
+        timer.join()
+    assert count == 1
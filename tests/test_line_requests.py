@@ -0,0 +1,64 @@
+# Copyright (c) 2021-2023, Texas Instruments Incorporated. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+import TI.GPIO as GPIO
+from TI.GPIO import gpio, gpio_sim
+
+
+def test_hw_pwm_leaves_shared_line_request(board):
+    GPIO.setlinegrouping(True)
+    GPIO.setup([7, 8, 29], GPIO.OUT, initial=GPIO.HIGH)
+    assert len(gpio._request_channels) == 1
+
+    pwm = GPIO.PWM(29, 1000)
+    pwm.start(50)
+    assert GPIO.input([7, 8]) == [GPIO.HIGH, GPIO.HIGH]
+    assert len(gpio._request_channels) == 1
+
+    GPIO.cleanup()
+    assert gpio._request_channels == {}
+    assert len(gpio.channelLineRequest) == 0
+
+
+def test_setup_list_requests_each_line_without_grouping(board):
+    GPIO.setup([7, 8, 10], GPIO.OUT)
+    assert len(gpio._request_channels) == 3
+
+    GPIO.cleanup(8)
+    assert len(gpio._request_channels) == 2
+
+
+def test_edge_detection_keeps_grouped_output_levels(board):
+    GPIO.setlinegrouping(True)
+    GPIO.setup([7, 8], GPIO.OUT)
+    GPIO.output([7, 8], [GPIO.HIGH, GPIO.LOW])
+    GPIO.setup(10, GPIO.IN)
+    assert len(gpio._request_channels) == 1
+
+    # Edge detection moves the line of 10 to a request of its own, and the
+    # lines of 7 and 8 are requested again
+    GPIO.add_event_detect(10, GPIO.BOTH)
+    assert len(gpio._request_channels) == 2
+    assert GPIO.input([7, 8]) == [GPIO.HIGH, GPIO.LOW]
+    for channel in (7, 8):
+        ch_info = gpio._channel_data[channel]
+        level = gpio_sim.get_output(ch_info.gpiochip, ch_info.gpio)
+        assert level == GPIO.input(channel)